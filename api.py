@@ -1,24 +1,145 @@
 import asyncio
+import json
 import os
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
 import aiohttp
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; responses decode with the stdlib
+    orjson = None
+
 load_dotenv()
 
 # Base URLs for Vybe API
 BASE_URL = "https://api.vybenetwork.xyz"
 HEADERS = {"accept": "application/json", "x-api-key": os.getenv("VYBE_API_KEY")}
 
+# Response bodies decode with orjson when available (several times faster on
+# the large transfer and balance payloads)
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# One ClientSession for the whole process so connections (and TLS sessions)
+# are pooled and kept alive across requests instead of rebuilt per call
+_session = None
+
+# Pool size and keep-alive for the shared session, and a ceiling on any single
+# request so a stalled connection can't hang a caller
+HTTP_POOL_LIMIT = 100
+HTTP_POOL_LIMIT_PER_HOST = 64
+HTTP_KEEPALIVE_SECONDS = 30
+HTTP_TIMEOUT = aiohttp.ClientTimeout(total=10)
+
+
+def _get_session():
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=HTTP_POOL_LIMIT,
+                limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+                keepalive_timeout=HTTP_KEEPALIVE_SECONDS,
+            ),
+            timeout=HTTP_TIMEOUT,
+        )
+    return _session
+
+
+async def close_session():
+    """Closes the shared ClientSession; call once on shutdown."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+def _is_transient(exc):
+    """True for errors worth retrying: timeouts, dropped connections, 429 and 5xx."""
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status == 429 or exc.status >= 500
+    return isinstance(exc, (asyncio.TimeoutError, aiohttp.ClientConnectionError))
+
+
+async def with_retry(fn, *, tries=3, base=0.5, timeout=10):
+    """Await ``fn()`` with a per-attempt timeout, retrying transient failures
+    with exponential backoff (base, 2*base, ...). The last error is re-raised.
+    """
+    for attempt in range(tries):
+        try:
+            return await asyncio.wait_for(fn(), timeout=timeout)
+        except Exception as e:
+            if attempt == tries - 1 or not _is_transient(e):
+                raise
+            await asyncio.sleep(base * 2**attempt)
+
+
+def _value_usd(tx):
+    """Parse a transfer's valueUsd as a float, sorting unparseable values last."""
+    try:
+        return float(tx.get("valueUsd") or 0)
+    except (TypeError, ValueError):
+        return float("-inf")
+
+
+# Token stats younger than this are served without touching the API
+TOKEN_STATS_TTL_SECONDS = float(os.getenv("TOKEN_STATS_TTL_SECONDS", 5))
+
+# Most recently used mints kept for reuse and revalidation; every mint seen in
+# wallet transfers passes through here, so the cache is capped
+_TOKEN_STATS_CACHE_MAX = 10_000
+
+# Last token stats body per mint, least recently used first:
+# (body, etag, last_modified, fetched_at)
+_token_stats_cache = OrderedDict()
+
+
+def _cache_token_stats(token_address, entry):
+    _token_stats_cache[token_address] = entry
+    _token_stats_cache.move_to_end(token_address)
+    if len(_token_stats_cache) > _TOKEN_STATS_CACHE_MAX:
+        _token_stats_cache.popitem(last=False)
+
 
 async def fetch_token_stats(token_address):
-    """Fetch token stats from Vybe API."""
+    """Fetch token stats from Vybe API.
+
+    Bodies are reused for TOKEN_STATS_TTL_SECONDS, which absorbs bursts of
+    lookups for popular tokens. Past that, responses carrying an ETag or
+    Last-Modified header are revalidated with a conditional request, so an
+    unchanged token costs a 304 instead of a full JSON body.
+    """
+    now = time.monotonic()
+    cached = _token_stats_cache.get(token_address)
+    if cached:
+        _token_stats_cache.move_to_end(token_address)
+        if now - cached[3] < TOKEN_STATS_TTL_SECONDS:
+            return cached[0]
+
     url = f"{BASE_URL}/token/{token_address}"
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=HEADERS) as response:
-            response.raise_for_status()
-            return await response.json()
+    headers = HEADERS
+    if cached and (cached[1] or cached[2]):
+        headers = dict(HEADERS)
+        if cached[1]:
+            headers["If-None-Match"] = cached[1]
+        if cached[2]:
+            headers["If-Modified-Since"] = cached[2]
+
+    session = _get_session()
+    async with session.get(url, headers=headers) as response:
+        if cached and response.status == 304:
+            _cache_token_stats(token_address, cached[:3] + (now,))
+            return cached[0]
+        response.raise_for_status()
+        data = await response.json(loads=_json_loads)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+
+    _cache_token_stats(token_address, (data, etag, last_modified, now))
+    return data
 
 
 async def fetch_whale_transaction(min_amount_usd=50000):
@@ -32,10 +153,10 @@ async def fetch_whale_transaction(min_amount_usd=50000):
     )
     url = f"{BASE_URL}/token/transfers?timeStart={start_date}"
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=HEADERS) as response:
-            response.raise_for_status()
-            data = await response.json()
+    session = _get_session()
+    async with session.get(url, headers=HEADERS) as response:
+        response.raise_for_status()
+        data = await response.json(loads=_json_loads)
 
     transactions = data.get("transfers", [])
 
@@ -43,9 +164,7 @@ async def fetch_whale_transaction(min_amount_usd=50000):
         return None
 
     # Get the top 10 transactions sorted by USD value
-    top_transactions = sorted(
-        transactions, key=lambda x: float(x.get("valueUsd", 0)), reverse=True
-    )[:10]
+    top_transactions = sorted(transactions, key=_value_usd, reverse=True)[:10]
 
     # Loop through each transaction to fetch the token symbol using mintAddress
     tasks = []
@@ -83,16 +202,16 @@ async def fetch_whale_transaction_for_single_token(
     )
 
     url = f"{BASE_URL}/token/transfers?mintAddress={mintAddress}&timeStart={start_date}&limit={limit}"
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=HEADERS) as response:
-            response.raise_for_status()
-            data = await response.json()
+    session = _get_session()
+    async with session.get(url, headers=HEADERS) as response:
+        response.raise_for_status()
+        data = await response.json(loads=_json_loads)
     transactions = data.get("transfers", [])
 
     if not transactions:
         return None
 
-    max_transaction = max(transactions, key=lambda x: float(x.get("valueUsd", 0)))
+    max_transaction = max(transactions, key=_value_usd)
 
     # Fetch token stats to get the token symbol
     token_stats_data = await fetch_token_stats(mintAddress)
@@ -101,6 +220,14 @@ async def fetch_whale_transaction_for_single_token(
     return max_transaction
 
 
+async def _fetch_transfers(url):
+    session = _get_session()
+    async with session.get(url, headers=HEADERS) as response:
+        response.raise_for_status()
+        data = await response.json(loads=_json_loads)
+    return data.get("transfers", [])
+
+
 async def fetch_wallet_activity(wallet_address, startDate=None):
     """Fetch wallet activity for a wallet as both sender and receiver, sorted by most recent blockTime."""
     if startDate is None:
@@ -109,70 +236,106 @@ async def fetch_wallet_activity(wallet_address, startDate=None):
     receiver_url = f"{BASE_URL}/token/transfers?receiverAddress={wallet_address}&timeStart={startDate}&limit=10"
     sender_url = f"{BASE_URL}/token/transfers?senderAddress={wallet_address}&timeStart={startDate}&limit=10"
 
-    async with aiohttp.ClientSession() as session:
-        async with (
-            session.get(receiver_url, headers=HEADERS) as receiver_response,
-            session.get(sender_url, headers=HEADERS) as sender_response,
-        ):
-            receiver_response.raise_for_status()
-            sender_response.raise_for_status()
-
-            receiver_data_json = await receiver_response.json()
-            sender_data_json = await sender_response.json()
-
-    receiver_data = receiver_data_json.get("transfers", [])
-    sender_data = sender_data_json.get("transfers", [])
+    # Both directions are requested concurrently; Vybe's REST API has no way
+    # to ask for sender-or-receiver in one call
+    receiver_data, sender_data = await asyncio.gather(
+        _fetch_transfers(receiver_url), _fetch_transfers(sender_url)
+    )
 
     combined = receiver_data + sender_data
     # Filter transactions by valueUsd > 0.01
-    filtered_transactions = [
-        tx for tx in combined if float(tx.get("valueUsd", 0)) > 0.01
-    ]
+    filtered_transactions = [tx for tx in combined if _value_usd(tx) > 0.01]
     combined_sorted = sorted(
         filtered_transactions, key=lambda x: x.get("blockTime", 0), reverse=True
     )
     return combined_sorted
 
 
+async def fetch_wallet_activity_batch(
+    wallet_addresses, startDate=None, concurrency=10, max_attempts=3, deadline=45
+):
+    """Fetch activity for several wallets, returning {address: transfers}.
+
+    Vybe has no multi-wallet transfers endpoint, so this issues one
+    fetch_wallet_activity per distinct address, at most ``concurrency`` at a
+    time. Wallets that hit a transient error (timeout, 429, 5xx) are retried
+    in a further round at half the concurrency, up to ``max_attempts``
+    fetches per wallet. No fetch starts, and none runs, past ``deadline``
+    seconds from the call. A wallet whose fetch still failed maps to the
+    raised exception.
+    """
+    addresses = list(dict.fromkeys(wallet_addresses))
+    end = time.monotonic() + deadline
+    results = {}
+
+    async def fetch(address, semaphore):
+        async with semaphore:
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            return await asyncio.wait_for(
+                fetch_wallet_activity(address, startDate=startDate), remaining
+            )
+
+    pending = addresses
+    for attempt in range(max_attempts):
+        if attempt:
+            await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+            concurrency = max(1, concurrency // 2)
+        semaphore = asyncio.Semaphore(concurrency)
+        outcomes = await asyncio.gather(
+            *(fetch(address, semaphore) for address in pending),
+            return_exceptions=True,
+        )
+        results.update(zip(pending, outcomes))
+        pending = [
+            address
+            for address, outcome in zip(pending, outcomes)
+            if isinstance(outcome, Exception) and _is_transient(outcome)
+        ]
+        if not pending or time.monotonic() >= end:
+            break
+    return {address: results[address] for address in addresses}
+
+
 async def fetch_recent_wallet_transactions(wallet_address, seconds_ago=120):
     """Fetch recent wallet transactions within the specified seconds."""
     start_date = int((datetime.now() - timedelta(seconds=seconds_ago)).timestamp())
+    return await fetch_wallet_activity(wallet_address, startDate=start_date)
 
-    receiver_url = f"{BASE_URL}/token/transfers?receiverAddress={wallet_address}&timeStart={start_date}&limit=10"
-    sender_url = f"{BASE_URL}/token/transfers?senderAddress={wallet_address}&timeStart={start_date}&limit=10"
 
-    async with aiohttp.ClientSession() as session:
-        async with (
-            session.get(receiver_url, headers=HEADERS) as receiver_response,
-            session.get(sender_url, headers=HEADERS) as sender_response,
-        ):
-            receiver_response.raise_for_status()
-            sender_response.raise_for_status()
+# Wallet balances younger than this are served without touching the API
+WALLET_BALANCE_TTL_SECONDS = float(os.getenv("WALLET_BALANCE_TTL_SECONDS", 30))
+# Past this many cached wallets, expired entries are dropped on insert
+_WALLET_BALANCE_CACHE_MAX = 10_000
 
-            receiver_data_json = await receiver_response.json()
-            sender_data_json = await sender_response.json()
+# Last balance body per wallet: (body, fetched_at)
+_wallet_balance_cache = {}
 
-    receiver_data = receiver_data_json.get("transfers", [])
-    sender_data = sender_data_json.get("transfers", [])
 
-    combined = receiver_data + sender_data
-    # Filter transactions by valueUsd > 0.01
-    filtered_transactions = [
-        tx for tx in combined if float(tx.get("valueUsd", 0)) > 0.01
-    ]
-    combined_sorted = sorted(
-        filtered_transactions, key=lambda x: x.get("blockTime", 0), reverse=True
-    )
-    return combined_sorted
+async def get_wallet_token_balance(owner_address):
+    """Fetch token balances for a specific wallet address from Vybe API.
 
+    Bodies are reused for WALLET_BALANCE_TTL_SECONDS, so repeat lookups of the
+    same wallet (often a popular one shared across chats) skip the API.
+    """
+    now = time.monotonic()
+    cached = _wallet_balance_cache.get(owner_address)
+    if cached and now - cached[1] < WALLET_BALANCE_TTL_SECONDS:
+        return cached[0]
 
-async def get_wallet_token_balance(owner_address):
-    """Fetch token balances for a specific wallet address from Vybe API."""
     url = f"{BASE_URL}/account/token-balance/{owner_address}"
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=HEADERS) as response:
-            response.raise_for_status()  # Will raise an HTTPError for bad responses (4xx or 5xx)
-            return await response.json()
+    session = _get_session()
+    async with session.get(url, headers=HEADERS) as response:
+        response.raise_for_status()  # Will raise an HTTPError for bad responses (4xx or 5xx)
+        data = await response.json(loads=_json_loads)
+
+    if len(_wallet_balance_cache) >= _WALLET_BALANCE_CACHE_MAX:
+        for address, (_, fetched_at) in list(_wallet_balance_cache.items()):
+            if now - fetched_at >= WALLET_BALANCE_TTL_SECONDS:
+                del _wallet_balance_cache[address]
+    _wallet_balance_cache[owner_address] = (data, now)
+    return data
 
 
 async def fetch_top_token_holders(mint_address, count=5):
@@ -187,10 +350,10 @@ async def fetch_top_token_holders(mint_address, count=5):
         list of dict: Top token holders.
     """
     url = f"{BASE_URL}/token/{mint_address}/top-holders"
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=HEADERS) as response:
-            response.raise_for_status()
-            data = await response.json()
+    session = _get_session()
+    async with session.get(url, headers=HEADERS) as response:
+        response.raise_for_status()
+        data = await response.json(loads=_json_loads)
     return data.get("data", [])[:count]
 
 
@@ -220,6 +383,8 @@ async def main():
     # token_stats = await fetch_token_stats("6p6xgHyF7AeE6TZkSmFsko444wqoP15icUSqi2jfGiPN")
     # print(token_stats)
 
+    await close_session()
+
 
 if __name__ == "__main__":
     asyncio.run(main())
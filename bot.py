@@ -1,9 +1,9 @@
 import asyncio
 import logging
 import os
-import re
+import tempfile
 
-import requests
+import aiohttp
 import telegram
 from dotenv import load_dotenv
 from telegram import BotCommand, InlineKeyboardButton, InlineKeyboardMarkup, Update
@@ -18,10 +18,22 @@ from telegram.ext import (
 )
 from telegram.request import HTTPXRequest
 
+try:
+    import fcntl
+except ImportError:  # Windows has no fcntl; skip the single-instance lock there
+    fcntl = None
+
+from api import close_session
 from core.dashboard import (
+    add_tracked_whale_alert_token,
     clear_user_dashboard,
+    get_token_alert_settings,
+    get_tracked_whale_alert_tokens,
     get_user_dashboard,
     remove_tracked_wallet,
+    remove_tracked_whale_alert_token,
+    set_token_alert_enabled,
+    set_token_alert_threshold,
 )
 
 # --- Research Agent Integration ---
@@ -31,8 +43,13 @@ from core.research_agent import (
 )
 from core.token_stats import process_token, show_top_holders
 from core.token_stats import token_prompt as core_token_prompt  # Rename to avoid clash
+from core.tokens import is_solana_address
+from core.utils import LRUDict, save_token_symbol_cache
 from core.wallet_tracker import (
+    WALLET_INPUT_ERRORS,
+    WALLET_PROMPT_TEXT,
     process_wallet,
+    save_last_transaction_times,
     show_recent_transactions,
     wallet_tracking_job,  # Import job directly
 )
@@ -41,6 +58,7 @@ from core.wallet_tracker import (
 )
 from core.whale_alerts import (  # Import job directly
     remove_whale_alert_handler,  # Added
+    track_token_whale_alert,
     whale_alert_job,
     whale_alerts_command,
 )
@@ -48,6 +66,69 @@ from core.whale_alerts import (
     set_threshold_prompt as core_set_threshold_prompt,  # Rename to avoid clash
 )
 
+# Static keyboards; PTB markups are immutable, so one instance is shared by
+# every message instead of being rebuilt per call
+_MAIN_MENU_MARKUP = InlineKeyboardMarkup(
+    [
+        [InlineKeyboardButton("Dashboard 📊", callback_data="dashboard")],
+        [
+            InlineKeyboardButton("Whale Alerts 🐋", callback_data="whale_alerts"),
+            InlineKeyboardButton("Wallet Tracker 💼", callback_data="wallet_tracker"),
+        ],
+        [
+            InlineKeyboardButton("Token Statistics 📈", callback_data="token_stats"),
+        ],
+        [
+            InlineKeyboardButton("Quick Commands ⚡", callback_data="quick_commands"),
+            InlineKeyboardButton("🆕Research Agent 🤖", callback_data="research_agent"),
+        ],
+    ]
+)
+_EMPTY_DASHBOARD_MARKUP = InlineKeyboardMarkup(
+    [
+        [
+            InlineKeyboardButton("Add Wallet ➕", callback_data="dashboard_add_wallet"),
+            InlineKeyboardButton(
+                "Remove Wallet ➖", callback_data="dashboard_remove_wallet"
+            ),
+        ],
+        [
+            InlineKeyboardButton(
+                "Add/Remove Whale Alerts ⚙", callback_data="whale_alerts"
+            ),
+            InlineKeyboardButton("🗑️ Clear Dashboard", callback_data="dashboard_clear"),
+        ],
+        [
+            InlineKeyboardButton("Back to Main Menu 🔙", callback_data="start"),
+        ],
+    ]
+)
+_DASHBOARD_MARKUP = InlineKeyboardMarkup(
+    [
+        [
+            InlineKeyboardButton("Add Wallet ➕", callback_data="dashboard_add_wallet"),
+            InlineKeyboardButton(
+                "Remove Wallet ➖", callback_data="dashboard_remove_wallet"
+            ),
+        ],
+        [
+            InlineKeyboardButton(
+                "Add/Remove Whale Alerts⚙", callback_data="whale_alerts"
+            ),
+            InlineKeyboardButton("🗑️ Clear Dashboard", callback_data="dashboard_clear"),
+        ],
+        [
+            InlineKeyboardButton("Back to Main Menu 🔙", callback_data="start"),
+        ],
+    ]
+)
+_SET_THRESHOLD_AGAIN_MARKUP = InlineKeyboardMarkup(
+    [[InlineKeyboardButton("Set Threshold Again 💰", callback_data="set_threshold")]]
+)
+_CLOSE_QUICK_COMMANDS_MARKUP = InlineKeyboardMarkup(
+    [[InlineKeyboardButton("Close ❌", callback_data="close_quick_commands")]]
+)
+
 
 class VybeScopeBot:
     def __init__(self):
@@ -63,14 +144,20 @@ class VybeScopeBot:
         self.WALLET_TRACKING_INTERVAL_SECONDS = int(
             os.getenv("WALLET_TRACKING_INTERVAL_SECONDS", 60)
         )
+        # getUpdates long-polling timeout (Telegram allows up to ~50s)
+        self.POLLING_TIMEOUT_SECONDS = int(os.getenv("POLLING_TIMEOUT_SECONDS", 50))
         self.user_thresholds = {}
-        self.user_states = {}
+        # Pending prompt per user; capped since abandoned prompts are never popped
+        self.user_states = LRUDict(maxsize=100_000)
         self.logger = logging.getLogger(__name__)
         logging.basicConfig(
             format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
             level=logging.INFO,
         )
         self.application = None
+        self.LOCK_FILE = os.getenv(
+            "BOT_LOCK_FILE", os.path.join(tempfile.gettempdir(), "vybe_bot.lock")
+        )
 
     async def start(self, update: Update, context: CallbackContext) -> None:
         """Sends the welcome message and main menu."""
@@ -85,31 +172,7 @@ class VybeScopeBot:
             "Select an option below to begin your journey! 👇"
         )
 
-        # Main menu keyboard
-        keyboard = [
-            [InlineKeyboardButton("Dashboard 📊", callback_data="dashboard")],
-            [
-                InlineKeyboardButton("Whale Alerts 🐋", callback_data="whale_alerts"),
-                InlineKeyboardButton(
-                    "Wallet Tracker 💼", callback_data="wallet_tracker"
-                ),
-            ],
-            [
-                InlineKeyboardButton(
-                    "Token Statistics 📈", callback_data="token_stats"
-                ),
-            ],
-            [
-                InlineKeyboardButton(
-                    "Quick Commands ⚡", callback_data="quick_commands"
-                ),
-                InlineKeyboardButton(
-                    "🆕Research Agent 🤖", callback_data="research_agent"
-                ),
-            ],
-        ]
-
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = _MAIN_MENU_MARKUP
 
         # Clear any previous state for the user
         if update.effective_user and update.effective_user.id in self.user_states:
@@ -141,10 +204,10 @@ class VybeScopeBot:
                     )
                 else:
                     self.logger.error(
-                        f"Error sending start photo (BadRequest): {e}. Skipping photo."
+                        "Error sending start photo (BadRequest): %s. Skipping photo.", e
                     )
             except Exception as e:
-                self.logger.error(f"Error sending start photo: {e}. Skipping photo.")
+                self.logger.error("Error sending start photo: %s. Skipping photo.", e)
 
         # Send or edit the welcome message
         try:
@@ -172,9 +235,9 @@ class VybeScopeBot:
             if "message is not modified" in str(e):
                 self.logger.info("Welcome message already shown.")
             else:
-                self.logger.error(f"Error sending/editing welcome message: {e}")
+                self.logger.error("Error sending/editing welcome message: %s", e)
         except Exception as e:
-            self.logger.error(f"Unexpected error in start handler: {e}")
+            self.logger.error("Unexpected error in start handler: %s", e)
 
     async def threshold_command(self, update: Update, context: CallbackContext) -> None:
         """Handles the /threshold command, triggers the prompt."""
@@ -218,11 +281,6 @@ class VybeScopeBot:
         wallets = dashboard.get("wallets", [])
 
         # Get tracked tokens and their settings
-        from core.dashboard import (
-            get_token_alert_settings,
-            get_tracked_whale_alert_tokens,
-        )
-
         tracked_tokens = get_tracked_whale_alert_tokens(user_id)
         token_settings = {
             token: get_token_alert_settings(user_id, token) for token in tracked_tokens
@@ -233,34 +291,14 @@ class VybeScopeBot:
         if is_empty:
             msg = "📊 *Your Dashboard is Empty!*\n\n"
             msg += "Add a wallet or set up whale alerts for tokens to get started."
-            keyboard = [
-                [
-                    InlineKeyboardButton(
-                        "Add Wallet ➕", callback_data="dashboard_add_wallet"
-                    ),
-                    InlineKeyboardButton(
-                        "Remove Wallet ➖", callback_data="dashboard_remove_wallet"
-                    ),
-                ],
-                [
-                    InlineKeyboardButton(
-                        "Add/Remove Whale Alerts ⚙", callback_data="whale_alerts"
-                    ),
-                    InlineKeyboardButton(
-                        "🗑️ Clear Dashboard", callback_data="dashboard_clear"
-                    ),
-                ],
-                [
-                    InlineKeyboardButton("Back to Main Menu 🔙", callback_data="start"),
-                ],
-            ]
+            reply_markup = _EMPTY_DASHBOARD_MARKUP
         else:
             msg = "📊 *Your Dashboard*\n\n"
 
             # Display wallets section
             msg += f"💼 *Tracked Wallets ({len(wallets)}):*\n"
             if wallets:
-                for w in wallets:
+                for w in sorted(wallets):
                     msg += f"`{w}`\n"
             else:
                 msg += "_None yet. Add one Immediately!_\n"
@@ -286,29 +324,7 @@ class VybeScopeBot:
                     msg += f"  Threshold: ${token_threshold:,.2f}\n"
 
             msg += "\n\nUse the buttons below to manage your dashboard."
-            keyboard = [
-                [
-                    InlineKeyboardButton(
-                        "Add Wallet ➕", callback_data="dashboard_add_wallet"
-                    ),
-                    InlineKeyboardButton(
-                        "Remove Wallet ➖", callback_data="dashboard_remove_wallet"
-                    ),
-                ],
-                [
-                    InlineKeyboardButton(
-                        "Add/Remove Whale Alerts⚙", callback_data="whale_alerts"
-                    ),
-                    InlineKeyboardButton(
-                        "🗑️ Clear Dashboard", callback_data="dashboard_clear"
-                    ),
-                ],
-                [
-                    InlineKeyboardButton("Back to Main Menu 🔙", callback_data="start"),
-                ],
-            ]
-
-        reply_markup = InlineKeyboardMarkup(keyboard)
+            reply_markup = _DASHBOARD_MARKUP
 
         try:
             if update.callback_query:
@@ -320,7 +336,7 @@ class VybeScopeBot:
                     text=msg, reply_markup=reply_markup, parse_mode="Markdown"
                 )
         except Exception as e:
-            self.logger.error(f"Error in dashboard_command: {e}")
+            self.logger.error("Error in dashboard_command: %s", e)
             await context.bot.send_message(
                 chat_id=update.effective_chat.id,
                 text=msg,
@@ -358,17 +374,9 @@ class VybeScopeBot:
             try:
                 threshold_value = float(text)
                 if threshold_value <= 0:
-                    keyboard = [
-                        [
-                            InlineKeyboardButton(
-                                "Set Threshold Again 💰", callback_data="set_threshold"
-                            )
-                        ]
-                    ]
-                    reply_markup = InlineKeyboardMarkup(keyboard)
                     await update.message.reply_text(
                         "❌ Threshold must be a positive number!",
-                        reply_markup=reply_markup,
+                        reply_markup=_SET_THRESHOLD_AGAIN_MARKUP,
                     )
                     self.user_states[user_id] = "awaiting_threshold"
                     return
@@ -378,17 +386,9 @@ class VybeScopeBot:
                 )
                 await whale_alerts_command(update, context)
             except ValueError:
-                keyboard = [
-                    [
-                        InlineKeyboardButton(
-                            "Set Threshold Again 💰", callback_data="set_threshold"
-                        )
-                    ]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
                 await update.message.reply_text(
                     "❌ Invalid amount! Please enter a number (e.g., 10000).",
-                    reply_markup=reply_markup,
+                    reply_markup=_SET_THRESHOLD_AGAIN_MARKUP,
                 )
                 self.user_states[user_id] = "awaiting_threshold"
 
@@ -398,25 +398,16 @@ class VybeScopeBot:
             if status == "unknown_symbol":
                 # Trigger the token prompt again (same as /token or token_stats callback)
                 await core_token_prompt(update, context, self.user_states)
+            elif status == "rate_limited":
+                # Keep waiting for a token so the user can just resend it
+                self.user_states[user_id] = "awaiting_token"
             return
 
         elif state == "awaiting_wallet":
             status = await process_wallet(user_id, text, context)
-            if status == "validation_error":
-                await update.message.reply_text(
-                    "❌ Invalid Solana wallet address format. Please ensure it is a valid Solana address (e.g., 3qArN...)."
-                )
-                await update.message.reply_text(
-                    "🔍 Enter a Solana wallet address to track its activity (e.g., 3qArN...):"
-                )
-                self.user_states[user_id] = "awaiting_wallet"
-            elif status == "empty_input":
-                await update.message.reply_text(
-                    "❌ Wallet address cannot be empty! Please enter a valid Solana address."
-                )
-                await update.message.reply_text(
-                    "🔍 Enter a Solana wallet address to track its activity (e.g., 3qArN...):"
-                )
+            if status in WALLET_INPUT_ERRORS:
+                await update.message.reply_text(WALLET_INPUT_ERRORS[status])
+                await update.message.reply_text(WALLET_PROMPT_TEXT)
                 self.user_states[user_id] = "awaiting_wallet"
             # For other statuses like "processed_successfully", "processed_successfully_no_tokens",
             # "processing_failed_api", "processing_failed_unexpected",
@@ -426,18 +417,8 @@ class VybeScopeBot:
             status = await process_wallet(
                 user_id, text, context
             )  # process_wallet calls add_tracked_wallet
-            if status == "validation_error":
-                await update.message.reply_text(
-                    "❌ Invalid Solana wallet address format. Please ensure it is a valid Solana address (e.g., 3qArN...)."
-                )
-                await update.message.reply_text(
-                    "💼 Please enter a valid wallet address to add:"
-                )
-                self.user_states[user_id] = "dashboard_awaiting_add_wallet"
-            elif status == "empty_input":
-                await update.message.reply_text(
-                    "❌ Wallet address cannot be empty! Please enter a valid Solana address."
-                )
+            if status in WALLET_INPUT_ERRORS:
+                await update.message.reply_text(WALLET_INPUT_ERRORS[status])
                 await update.message.reply_text(
                     "💼 Please enter a valid wallet address to add:"
                 )
@@ -466,10 +447,8 @@ class VybeScopeBot:
             await self.dashboard_command(update, context)
 
         elif state == "dashboard_awaiting_add_whale_alert":
-            from core.dashboard import add_tracked_whale_alert_token
-
             # Validate token address format before processing
-            if not re.match(r"^[1-9A-HJ-NP-Za-km-z]{32,44}$", text):
+            if not is_solana_address(text):
                 await update.message.reply_text(
                     "❌ Invalid Solana token address format. Please ensure it is a valid Solana address (e.g., So1111... or similar)."
                 )
@@ -489,8 +468,6 @@ class VybeScopeBot:
                 )
             await self.dashboard_command(update, context)
         elif state == "dashboard_awaiting_remove_whale_alert":
-            from core.dashboard import remove_tracked_whale_alert_token
-
             removed = remove_tracked_whale_alert_token(user_id, text)
             if removed:
                 await update.message.reply_text(
@@ -514,8 +491,6 @@ class VybeScopeBot:
                         f"awaiting_token_threshold_{token_address}"
                     )
                     return
-                from core.dashboard import set_token_alert_threshold
-
                 set_token_alert_threshold(user_id, token_address, threshold_value)
                 await update.message.reply_text(
                     f"✅ Whale alert threshold for `{token_address}` set to ${threshold_value:,.2f}!"
@@ -528,7 +503,7 @@ class VybeScopeBot:
                 self.user_states[user_id] = f"awaiting_token_threshold_{token_address}"
 
         else:
-            self.logger.warning(f"User {user_id} was in an unknown state: {state}")
+            self.logger.warning("User %s was in an unknown state: %s", user_id, state)
             await update.message.reply_text("Something went wrong. Please try /start.")
 
     async def button_handler(self, update: Update, context: CallbackContext) -> None:
@@ -606,24 +581,17 @@ class VybeScopeBot:
                 "• The bot guides you with prompts for most operations."
             )
 
-            close_markup = InlineKeyboardMarkup(
-                [
-                    [
-                        InlineKeyboardButton(
-                            "Close ❌", callback_data="close_quick_commands"
-                        )
-                    ]
-                ]
-            )
             await query.message.reply_text(
-                quick_commands_msg, parse_mode="Markdown", reply_markup=close_markup
+                quick_commands_msg,
+                parse_mode="Markdown",
+                reply_markup=_CLOSE_QUICK_COMMANDS_MARKUP,
             )
             return
         elif callback_data == "close_quick_commands":
             try:
                 await query.message.delete()
             except Exception as e:
-                self.logger.warning(f"Failed to delete quick commands message: {e}")
+                self.logger.warning("Failed to delete quick commands message: %s", e)
             return
         elif callback_data.startswith("show_top_holders_"):
             token_address = callback_data.replace("show_top_holders_", "")
@@ -632,7 +600,7 @@ class VybeScopeBot:
             try:
                 await query.message.delete()
             except Exception as e:
-                self.logger.warning(f"Failed to delete top holders message: {e}")
+                self.logger.warning("Failed to delete top holders message: %s", e)
             return
         elif callback_data.startswith("show_recent_tx_"):
             wallet_address = callback_data.replace("show_recent_tx_", "")
@@ -656,25 +624,19 @@ class VybeScopeBot:
             try:
                 await query.message.delete()
             except Exception as e:
-                self.logger.warning(f"Failed to delete recent tx message: {e}")
+                self.logger.warning("Failed to delete recent tx message: %s", e)
             return
         elif callback_data.startswith("track_whale_alert_"):
             # Call our new function that handles adding tokens to whale alerts
-            from core.whale_alerts import track_token_whale_alert
-
             await track_token_whale_alert(update, context)
         elif callback_data.startswith("add_whale_alert_token_"):
             token_address = callback_data.replace("add_whale_alert_token_", "")
-            from core.dashboard import add_tracked_whale_alert_token
-
             add_tracked_whale_alert_token(user_id, token_address)
             await query.message.reply_text(
                 f"✅ Token `{token_address}` added to your whale alerts!"
             )
         elif callback_data.startswith("remove_whale_alert_token_"):
             token_address = callback_data.replace("remove_whale_alert_token_", "")
-            from core.dashboard import remove_tracked_whale_alert_token
-
             remove_tracked_whale_alert_token(user_id, token_address)
             await query.message.reply_text(
                 f"✅ Token `{token_address}` removed from your whale alerts!"
@@ -682,8 +644,6 @@ class VybeScopeBot:
         elif callback_data.startswith("toggle_token_on:") or callback_data.startswith(
             "toggle_token_off:"
         ):
-            from core.dashboard import set_token_alert_enabled
-
             parts = callback_data.split(":", 1)
             if len(parts) == 2:
                 token_address = parts[1]
@@ -695,8 +655,6 @@ class VybeScopeBot:
                 )
                 await whale_alerts_command(update, context)
         elif callback_data.startswith("disable_alert:"):
-            from core.dashboard import set_token_alert_enabled
-
             token_address = callback_data.split(":", 1)[1]
             set_token_alert_enabled(user_id, token_address, False)
             await query.message.reply_text(
@@ -711,7 +669,7 @@ class VybeScopeBot:
                 update, context
             )  # Modified to call wrapper
         else:
-            self.logger.info(f"Received unhandled callback_data: {callback_data}")
+            self.logger.info("Received unhandled callback_data: %s", callback_data)
 
     async def set_token_threshold_prompt_wrapper(
         self, update: Update, context: CallbackContext
@@ -745,19 +703,22 @@ class VybeScopeBot:
                 error_message = (
                     "❌ Sorry, the message you interacted with might be too old."
                 )
-        elif isinstance(context.error, requests.RequestException):
+        elif isinstance(context.error, (aiohttp.ClientError, asyncio.TimeoutError)):
             self.logger.error(
-                f"Network error connecting to external API: {context.error}"
+                "Network error connecting to external API: %s", context.error
             )
             error_message = "❌ Network error: Could not connect to external services. Please try again later."
         elif isinstance(context.error, telegram.error.Forbidden):
             self.logger.warning(
-                f"Forbidden error: {context.error}. Bot might be blocked by the user {chat_id}."
+                "Forbidden error: %s. Bot might be blocked by the user %s.",
+                context.error,
+                chat_id,
             )
             return
         elif isinstance(context.error, telegram.error.NetworkError):
             self.logger.error(
-                f"Telegram Network error: {context.error}. Retrying or waiting might help."
+                "Telegram Network error: %s. Retrying or waiting might help.",
+                context.error,
             )
             error_message = (
                 "❌ Network error communicating with Telegram. Please try again."
@@ -768,18 +729,65 @@ class VybeScopeBot:
                 await context.bot.send_message(chat_id=chat_id, text=error_message)
             except Exception as e:
                 self.logger.error(
-                    f"Failed to send error message to user {chat_id}: {e}"
+                    "Failed to send error message to user %s: %s", chat_id, e
                 )
 
+    def _acquire_instance_lock(self):
+        """Takes an exclusive lock so only one poller runs per host.
+
+        Two processes calling getUpdates with the same token get 409 Conflict
+        responses and silently drop updates. Returns the open lock file (keep it
+        open for the lifetime of the process), or None if another instance holds it.
+        """
+        lock_fp = open(self.LOCK_FILE, "a+")  # Don't truncate the holder's pid
+        if fcntl is None:
+            return lock_fp
+        try:
+            fcntl.flock(lock_fp, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_fp.close()
+            return None
+        lock_fp.seek(0)
+        lock_fp.truncate()
+        lock_fp.write(str(os.getpid()))
+        lock_fp.flush()
+        return lock_fp
+
+    async def _post_shutdown(self, application):
+        # Release the pooled Vybe API connections
+        await close_session()
+        save_last_transaction_times()
+        save_token_symbol_cache()
+
     def run(self):
         self.logger.info("Initializing VybeScope Bot...")
+        lock_fp = self._acquire_instance_lock()
+        if lock_fp is None:
+            self.logger.error(
+                "Another VybeScope instance holds %s. Exiting.", self.LOCK_FILE
+            )
+            return
+        # Large pool so concurrent handlers never queue for a free connection
         request = HTTPXRequest(
-            connection_pool_size=10,
-            read_timeout=30.0,
-            connect_timeout=30.0,
+            connection_pool_size=256,
+            read_timeout=60.0,
+            connect_timeout=20.0,
+            pool_timeout=5.0,
+        )
+        # Separate request object for getUpdates so long polls don't hold a
+        # connection from the main pool (read_timeout must exceed poll timeout)
+        get_updates_request = HTTPXRequest(
+            connection_pool_size=1,
+            read_timeout=self.POLLING_TIMEOUT_SECONDS + 10.0,
+            connect_timeout=20.0,
         )
         self.application = (
-            Application.builder().token(self.TELEGRAM_TOKEN).request(request).build()
+            Application.builder()
+            .token(self.TELEGRAM_TOKEN)
+            .request(request)
+            .get_updates_request(get_updates_request)
+            .post_shutdown(self._post_shutdown)
+            .build()
         )
 
         async def set_bot_commands():
@@ -823,22 +831,31 @@ class VybeScopeBot:
         self.application.add_error_handler(self.error_handler)
 
         # Use Telegram's JobQueue to schedule whale alerts
+        # Jobs reach the application through context.application; the short
+        # first delay lets polling start before the first tick
         self.application.job_queue.run_repeating(
             wallet_tracking_job,
             interval=self.WALLET_TRACKING_INTERVAL_SECONDS,
+            first=5,
             name="wallet_tracking_job",
-            data=self.application,  # Pass application instance
         )
 
         self.application.job_queue.run_repeating(
             whale_alert_job,
             interval=self.WHALE_ALERT_INTERVAL_SECONDS,
+            first=5,
             name="whale_alert_job",
-            data=self.application,  # Pass application instance
         )
 
         self.logger.info("Starting bot polling...")
-        self.application.run_polling(allowed_updates=Update.ALL_TYPES)
+        try:
+            self.application.run_polling(
+                poll_interval=0.0,
+                timeout=self.POLLING_TIMEOUT_SECONDS,
+                allowed_updates=Update.ALL_TYPES,
+            )
+        finally:
+            lock_fp.close()  # Releases the flock
 
 
 if __name__ == "__main__":
@@ -1,145 +1,243 @@
+import copy
 import json
+import logging
 import os
-from threading import Lock
+from threading import Lock, RLock
+
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib parser/serializer
+    orjson = None
+
+logger = logging.getLogger(__name__)
 
 DASHBOARD_FILE = os.path.join(os.path.dirname(__file__), "..", "user_dashboard.json")
-_dashboard_lock = Lock()
+# Re-entrant so _mutate_dashboard can hold it across load and save
+_dashboard_lock = RLock()
 
+# Parsed dashboard, valid while the file's mtime matches
+_cache = {"mtime": None, "data": None}
+_cache_lock = Lock()
 
-def _load_dashboard():
-    if not os.path.exists(DASHBOARD_FILE):
+
+def _loads(raw):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _encode_set(obj):
+    # Wallets are held as sets in memory and stored as sorted lists on disk
+    if isinstance(obj, set):
+        return sorted(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data, default=_encode_set, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, default=_encode_set, indent=2).encode("utf-8")
+
+
+def _parse(raw):
+    """Decodes the dashboard, turning each user's wallets into a set. Malformed
+    users are left as they are (and written back unchanged) rather than
+    discarding the whole file.
+    """
+    data = _loads(raw)
+    if not isinstance(data, dict):
+        raise ValueError("dashboard is not a JSON object")
+    for user_id, user in data.items():
+        if not isinstance(user, dict):
+            logger.warning("Skipping malformed dashboard entry for user %s", user_id)
+            continue
+        try:
+            user["wallets"] = set(user.get("wallets") or ())
+        except TypeError:
+            logger.warning("Skipping malformed wallets for user %s", user_id)
+    return data
+
+
+def _load_dashboard_ro():
+    """Returns the parsed dashboard shared with other readers. Do not mutate it;
+    use _load_dashboard() when the result will be modified and saved.
+    """
+    try:
+        mtime = os.stat(DASHBOARD_FILE).st_mtime_ns
+    except FileNotFoundError:
         return {}
-    with open(DASHBOARD_FILE, "r", encoding="utf-8") as f:
+    with _cache_lock:
+        if _cache["mtime"] == mtime:
+            return _cache["data"]
+    with open(DASHBOARD_FILE, "rb") as f:
         try:
-            return json.load(f)
-        except Exception:
-            return {}
+            data = _parse(f.read())
+        except ValueError as e:
+            logger.error("Failed to decode %s: %s", DASHBOARD_FILE, e)
+            data = {}
+    with _cache_lock:
+        _cache["mtime"] = mtime
+        _cache["data"] = data
+    return data
+
+
+# (user_id, user) pairs with int ids, rebuilt only when the snapshot changes
+_users_view = {"data": None, "users": ()}
+
+
+def _dashboard_users():
+    """Returns ``((int_user_id, user), ...)`` for the current dashboard, so
+    periodic jobs don't re-parse every user id on every tick. Read-only, like
+    _load_dashboard_ro().
+    """
+    data = _load_dashboard_ro()
+    with _cache_lock:
+        if _users_view["data"] is data:
+            return _users_view["users"]
+    # Malformed entries (see _parse) are left out of the jobs' view
+    users = tuple(
+        (int(user_id), user)
+        for user_id, user in data.items()
+        if user_id.isdigit() and isinstance(user, dict)
+    )
+    with _cache_lock:
+        _users_view["data"] = data
+        _users_view["users"] = users
+    return users
+
+
+# wallet -> [user_id, ...] over the same snapshot, rebuilt with it
+_subscribers_view = {"data": None, "subscribers": {}}
+
+
+def _wallet_subscribers():
+    """Returns ``{wallet_address: [int_user_id, ...]}`` across all users, so
+    the wallet tracker fetches each wallet once however many users track it.
+    Rebuilt only when the dashboard changes; read-only like
+    _load_dashboard_ro().
+    """
+    data = _load_dashboard_ro()
+    with _cache_lock:
+        if _subscribers_view["data"] is data:
+            return _subscribers_view["subscribers"]
+    subscribers = {}
+    for user_id, user in _dashboard_users():
+        wallets = user.get("wallets")
+        if not isinstance(wallets, set):
+            continue
+        for wallet_address in wallets:
+            subscribers.setdefault(wallet_address, []).append(user_id)
+    with _cache_lock:
+        _subscribers_view["data"] = data
+        _subscribers_view["subscribers"] = subscribers
+    return subscribers
+
+
+def _load_dashboard():
+    """Returns a private copy of the dashboard that the caller may mutate."""
+    return copy.deepcopy(_load_dashboard_ro())
 
 
 def _save_dashboard(data):
     with _dashboard_lock:
-        with open(DASHBOARD_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+        # Write a sibling temp file and rename it over the dashboard, so a crash
+        # mid-write never leaves a truncated file. No fsync: durability across
+        # power loss isn't worth a disk flush on every settings change.
+        tmp_path = DASHBOARD_FILE + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_dumps(data))
+        os.replace(tmp_path, DASHBOARD_FILE)
+        # Prime the cache so the next read skips the re-parse
+        with _cache_lock:
+            _cache["mtime"] = os.stat(DASHBOARD_FILE).st_mtime_ns
+            _cache["data"] = data
+
+
+def _default_user():
+    return {"wallets": set(), "whale_alert": {"tokens": {}}}
+
+
+def _user_tokens(user):
+    whale_alert = user.setdefault("whale_alert", {})
+    if "tokens" not in whale_alert or not isinstance(whale_alert["tokens"], dict):
+        whale_alert["tokens"] = {}
+    return whale_alert["tokens"]
+
+
+def _mutate_dashboard(user_id, mutator):
+    """Applies ``mutator(user)`` to the user's entry and saves the dashboard if
+    it returned True. Load and save happen under one lock hold, so concurrent
+    mutations can't overwrite each other. Returns what the mutator returned.
+    """
+    with _dashboard_lock:
+        data = _load_dashboard()
+        user = data.setdefault(str(user_id), _default_user())
+        changed = mutator(user)
+        if changed:
+            _save_dashboard(data)
+        return changed
 
 
 def get_user_dashboard(user_id):
-    data = _load_dashboard()
-    return data.get(
-        str(user_id),
-        {
-            "wallets": [],
-            "whale_alert": {
-                "tokens": {},
-            },
-        },
-    )
+    data = _load_dashboard_ro()
+    return data.get(str(user_id), _default_user())
 
 
 def add_tracked_wallet(user_id, wallet_address):
-    data = _load_dashboard()
-    user = data.setdefault(
-        str(user_id),
-        {
-            "wallets": [],
-            "whale_alert": {
-                "tokens": {},
-            },
-        },
-    )
-    if wallet_address not in user["wallets"]:
-        user["wallets"].append(wallet_address)
-        _save_dashboard(data)
+    def add(user):
+        if wallet_address in user["wallets"]:
+            return False
+        user["wallets"].add(wallet_address)
         return True
-    return False
+
+    return _mutate_dashboard(user_id, add)
 
 
 def remove_tracked_wallet(user_id, wallet_address):
-    data = _load_dashboard()
-    user = data.setdefault(
-        str(user_id),
-        {
-            "wallets": [],
-            "whale_alert": {
-                "tokens": {},
-            },
-        },
-    )
-    if wallet_address in user["wallets"]:
-        user["wallets"].remove(wallet_address)
-        _save_dashboard(data)
+    def remove(user):
+        if wallet_address not in user["wallets"]:
+            return False
+        user["wallets"].discard(wallet_address)
         return True
-    return False
+
+    return _mutate_dashboard(user_id, remove)
 
 
 def clear_user_dashboard(user_id):
     """Remove all dashboard data for a user."""
-    data = _load_dashboard()
-    if str(user_id) in data:
-        del data[str(user_id)]
-        _save_dashboard(data)
-        return True
-    return False
+    with _dashboard_lock:
+        data = _load_dashboard()
+        if str(user_id) in data:
+            del data[str(user_id)]
+            _save_dashboard(data)
+            return True
+        return False
 
 
 # --- Whale Alert Token Management ---
 def add_tracked_whale_alert_token(
     user_id, token_address, enabled=True, threshold=50000
 ):
-    data = _load_dashboard()
-    user = data.setdefault(
-        str(user_id),
-        {
-            "wallets": [],
-            "whale_alert": {
-                "tokens": {},
-            },
-        },
-    )
-    whale_alert = user["whale_alert"]
-    if "tokens" not in whale_alert or not isinstance(whale_alert["tokens"], dict):
-        whale_alert["tokens"] = {}
-    if token_address not in whale_alert["tokens"]:
-        whale_alert["tokens"][token_address] = {
-            "enabled": enabled,
-            "threshold": threshold,
-        }
-        _save_dashboard(data)
+    def add(user):
+        tokens = _user_tokens(user)
+        if token_address in tokens:
+            return False
+        tokens[token_address] = {"enabled": enabled, "threshold": threshold}
         return True
-    return False
+
+    return _mutate_dashboard(user_id, add)
 
 
 def remove_tracked_whale_alert_token(user_id, token_address):
-    data = _load_dashboard()
-    user = data.setdefault(
-        str(user_id),
-        {
-            "wallets": [],
-            "whale_alert": {
-                "tokens": {},
-            },
-        },
-    )
-    whale_alert = user["whale_alert"]
-    if "tokens" not in whale_alert or not isinstance(whale_alert["tokens"], dict):
-        whale_alert["tokens"] = {}
-    if token_address in whale_alert["tokens"]:
-        del whale_alert["tokens"][token_address]
-        _save_dashboard(data)
-        return True
-    return False
+    def remove(user):
+        return _user_tokens(user).pop(token_address, None) is not None
+
+    return _mutate_dashboard(user_id, remove)
 
 
 def get_tracked_whale_alert_tokens(user_id):
-    data = _load_dashboard()
-    user = data.get(
-        str(user_id),
-        {
-            "wallets": [],
-            "whale_alert": {
-                "tokens": {},
-            },
-        },
-    )
+    data = _load_dashboard_ro()
+    user = data.get(str(user_id), _default_user())
     whale_alert = user["whale_alert"]
     if "tokens" not in whale_alert or not isinstance(whale_alert["tokens"], dict):
         return []
@@ -147,7 +245,7 @@ def get_tracked_whale_alert_tokens(user_id):
 
 
 def get_token_alert_settings(user_id, token_address):
-    data = _load_dashboard()
+    data = _load_dashboard_ro()
     user = data.get(str(user_id), {})
     whale_alert = user.get("whale_alert", {})
     tokens = whale_alert.get("tokens", {})
@@ -155,29 +253,25 @@ def get_token_alert_settings(user_id, token_address):
 
 
 def set_token_alert_enabled(user_id, token_address, enabled):
-    data = _load_dashboard()
-    user = data.setdefault(str(user_id), {"wallets": [], "whale_alert": {"tokens": {}}})
-    whale_alert = user["whale_alert"]
-    if "tokens" not in whale_alert or not isinstance(whale_alert["tokens"], dict):
-        whale_alert["tokens"] = {}
-    if token_address not in whale_alert["tokens"]:
-        whale_alert["tokens"][token_address] = {"enabled": enabled, "threshold": 50000}
-    else:
-        whale_alert["tokens"][token_address]["enabled"] = enabled
-    _save_dashboard(data)
+    def update(user):
+        settings = _user_tokens(user).setdefault(
+            token_address, {"enabled": enabled, "threshold": 50000}
+        )
+        settings["enabled"] = enabled
+        return True
+
+    _mutate_dashboard(user_id, update)
 
 
 def set_token_alert_threshold(user_id, token_address, threshold):
-    data = _load_dashboard()
-    user = data.setdefault(str(user_id), {"wallets": [], "whale_alert": {"tokens": {}}})
-    whale_alert = user["whale_alert"]
-    if "tokens" not in whale_alert or not isinstance(whale_alert["tokens"], dict):
-        whale_alert["tokens"] = {}
-    if token_address not in whale_alert["tokens"]:
-        whale_alert["tokens"][token_address] = {"enabled": True, "threshold": threshold}
-    else:
-        whale_alert["tokens"][token_address]["threshold"] = threshold
-    _save_dashboard(data)
+    def update(user):
+        settings = _user_tokens(user).setdefault(
+            token_address, {"enabled": True, "threshold": threshold}
+        )
+        settings["threshold"] = threshold
+        return True
+
+    _mutate_dashboard(user_id, update)
 
 
 def set_whale_alerts_enabled(user_id, enabled):
@@ -1,5 +1,6 @@
 import asyncio
 import os
+from io import BytesIO
 
 from dotenv import load_dotenv
 from telegram import (
@@ -11,6 +12,8 @@ from telegram import (
 )
 from telegram.ext import CallbackContext
 
+from core.utils import LRUDict
+
 load_dotenv()
 
 PEPE_AGENT_IMAGE_PATH = os.path.join(
@@ -26,17 +29,25 @@ SYSTEM_PROMPT = (
     "If a question is unclear, ask for clarification in a single sentence."
 )
 
-# In-memory toggle state for users
-user_research_agent_state = {}
+# Static asset, read once; after the first upload Telegram's file_id is reused
+with open(PEPE_AGENT_IMAGE_PATH, "rb") as _f:
+    _PEPE_AGENT_BYTES = _f.read()
+_pepe_agent_file_id = None
+
+# In-memory toggle state for users, capped so it can't grow without bound
+user_research_agent_state = LRUDict(maxsize=100_000)
 
 
 async def send_temp_image_and_delete(
     update: Update, context: CallbackContext, duration: int = 3
 ):
-    with open(PEPE_AGENT_IMAGE_PATH, "rb") as img:
-        msg = await context.bot.send_photo(
-            chat_id=update.effective_chat.id, photo=InputFile(img)
-        )
+    global _pepe_agent_file_id
+    photo = _pepe_agent_file_id or InputFile(
+        BytesIO(_PEPE_AGENT_BYTES), filename="pepe_agent.png"
+    )
+    msg = await context.bot.send_photo(chat_id=update.effective_chat.id, photo=photo)
+    if _pepe_agent_file_id is None and msg.photo:
+        _pepe_agent_file_id = msg.photo[-1].file_id
     await asyncio.sleep(duration)
     await context.bot.delete_message(
         chat_id=update.effective_chat.id, message_id=msg.message_id
@@ -66,7 +77,7 @@ async def send_research_agent_miniapp_button(update: Update, context: CallbackCo
 async def research_agent_handler(update: Update, context: CallbackContext):
     await send_temp_image_and_delete(update, context)
     await send_research_agent_miniapp_button(update, context)
-    if hasattr(update, "callback_query") and update.callback_query:
+    if update.callback_query is not None:
         await update.callback_query.answer("Opening Research Agent Mini App...")
 
 
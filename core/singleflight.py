@@ -0,0 +1,21 @@
+import asyncio
+
+# In-flight calls keyed by request identity, e.g. "token_stats:<mint>"
+_pending = {}
+
+
+async def singleflight(key, fn):
+    """Run ``fn()`` once for all concurrent callers sharing the same key.
+
+    The first caller starts the coroutine; anyone arriving while it is still
+    running awaits the same result (or exception) instead of issuing a duplicate
+    API request. The key is released as soon as the call finishes, so later
+    callers always get a fresh request.
+    """
+    task = _pending.get(key)
+    if task is None:
+        task = asyncio.ensure_future(fn())
+        _pending[key] = task
+        task.add_done_callback(lambda _: _pending.pop(key, None))
+    # Shield so one caller being cancelled doesn't cancel the shared request
+    return await asyncio.shield(task)
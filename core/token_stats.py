@@ -1,32 +1,75 @@
 import asyncio
 import logging
-import re
+import sys
 import time
 
-import requests
+import aiohttp
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.constants import ChatAction
 from telegram.ext import Application
 
 from api import fetch_token_stats, fetch_top_token_holders
+from core.singleflight import singleflight
+from core.tokens import ADDRESS_TO_SYMBOL, BASE58_ADDRESS_RE, TOKEN_ADDRESS_MAP
 from core.top_holders_table import format_top_holders_text
+from core.utils import LRUDict, delete_message_after
 
 logger = logging.getLogger(__name__)
 
-# Token symbol to Solana token address mapping
-TOKEN_ADDRESS_MAP = {
-    "SOL": "So11111111111111111111111111111111111111112",  # Solana (Wrapped SOL)
-    "USDC": "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v",  # USD Coin
-    "USDT": "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB",  # Tether USD
-    "BONK": "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263",  # Bonk
-    "WIF": "EKpQGSJtjMFqKZ9KQanSqYXRcF8fBopzLHYxdM65zcjm",  # dogwifhat
-    "PYTH": "HZ1JovNiVvGrGNiiYvEozEVgZ58xaU3RKwX8eACQBCt3",  # Pyth Network
-    "JTO": "jtojtomepa8beP8AuQc6eXt5FriJwfFMwQx2v2f9mCL",  # Jito
-    "RNDR": "rndrizKT3MK1iimdxRdWabcF7Zg7AR5T4nud4EkHBof",  # Render Token (SPL)
-    "HNT": "hntyVP6YFm1Hg25TN9WGLqM12b8TQmcknKrdu1oxWux",  # Helium
-    "TRUMP": "6p6xgHyF7AeE6TZkSmFsko444wqoP15icUSqi2jfGiPN",  # OFFICIAL TRUMP
-    # Add more mappings here as needed
-}
+# Static keyboard pieces; only rows embedding a token address are built per call
+_TRY_AGAIN_MARKUP = InlineKeyboardMarkup(
+    [[InlineKeyboardButton("Try Again 📈", callback_data="token_stats")]]
+)
+_CHECK_ANOTHER_ROW = (
+    InlineKeyboardButton("Check Another Token/Address 📈", callback_data="token_stats"),
+)
+_BACK_TO_MAIN_ROW = (
+    InlineKeyboardButton("Back to Main Menu 🔙", callback_data="start"),
+)
+
+_STATS_TEMPLATE = (
+    "📊 *{name} ({symbol}) Stats*\n"
+    "   Address: `{address}`\n\n"
+    "Price: *${price}*\n"
+    "24h Change: *{change}% {trend}*\n"
+    "24h Volume: *${volume}*\n"
+    "Market Cap: *${market_cap}*\n"
+)
+
+
+def _to_float(n):
+    """Parses an API number, returning None if it is missing or malformed."""
+    if n is None or isinstance(n, float):
+        return n
+    try:
+        return float(n)
+    except (ValueError, TypeError):
+        return None
+
+
+def _fmt(n, precision=2, default="N/A"):
+    """Formats a number with thousands separators, parsing strings if needed."""
+    if n is None:
+        return default
+    if isinstance(n, (int, float)):
+        return f"{n:,.{precision}f}"
+    try:
+        return f"{float(n):,.{precision}f}"
+    except (ValueError, TypeError):
+        return default
+
+
+def _classify(token_input):
+    """Resolves user input to ``(address, display_symbol)``.
+
+    Addresses pass through with their known symbol or a truncated placeholder,
+    known symbols map to their address, and unknown symbols return
+    ``(None, symbol)``.
+    """
+    if BASE58_ADDRESS_RE.match(token_input):
+        return token_input, ADDRESS_TO_SYMBOL.get(token_input, token_input[:6] + "...")
+    symbol = sys.intern(token_input.upper())
+    return TOKEN_ADDRESS_MAP.get(symbol), symbol
 
 
 # Check token stats (Prompt)
@@ -40,7 +83,7 @@ async def token_prompt(update: Update, context: Application, user_states: dict)
         logger.warning("token_prompt couldn't find message or user.")
         return
 
-    if query:
+    if query is not None:
         await query.answer()
 
     user_id = user.id
@@ -52,9 +95,14 @@ async def token_prompt(update: Update, context: Application, user_states: dict)
 
 
 async def show_top_holders(user_id: int, token_address: str, context: Application):
-    await context.bot.send_chat_action(chat_id=user_id, action=ChatAction.TYPING)
     try:
-        holders = await fetch_top_token_holders(token_address)
+        _, holders = await asyncio.gather(
+            context.bot.send_chat_action(chat_id=user_id, action=ChatAction.TYPING),
+            singleflight(
+                f"top_holders:{token_address}",
+                lambda: fetch_top_token_holders(token_address),
+            ),
+        )
         holders_text = format_top_holders_text(holders)
         keyboard = [
             [
@@ -75,65 +123,84 @@ async def show_top_holders(user_id: int, token_address: str, context: Applicatio
         # Store the message id for deletion
         context.user_data["last_top_holders_msg_id"] = sent_msg.message_id
     except Exception as e:
-        logger.error(f"Error fetching top holders: {e}")
+        logger.error("Error fetching top holders: %s", e)
         await context.bot.send_message(
             chat_id=user_id,
             text="❌ Failed to fetch top holders.",
         )
 
 
-async def process_token(user_id: int, token_input: str, context: Application) -> None:
-    await context.bot.send_chat_action(chat_id=user_id, action=ChatAction.TYPING)
-    # Improved logic: Check if it's a symbol OR a potential address
-    token_input = token_input.strip()
-    token_address = None
-    token_symbol = None
-
-    # Simple check if it looks like an address (Base58, > 30 chars)
-    # Use raw string for regex pattern
-    if re.match(r"^[1-9A-HJ-NP-Za-km-z]{32,44}$", token_input):
-        token_address = token_input
-        # We might not know the symbol initially from just the address
-        token_symbol = token_address[:6] + "..."  # Placeholder symbol
-    else:
-        # Assume it's a symbol
-        token_symbol = token_input.upper()
-        if token_symbol in TOKEN_ADDRESS_MAP:
-            token_address = TOKEN_ADDRESS_MAP[token_symbol]
-        else:
-            # Unknown symbol: inform user (prompt will be re-triggered by handler)
-            await context.bot.send_message(
-                chat_id=user_id, text=f"❌ Unknown token symbol: {token_symbol}."
-            )
-            return "unknown_symbol"
+# Telegram file_id of the pepe_sniper image, set after its first upload
+_pepe_sniper_file_id = None
 
-    if not token_address:
-        # This case should ideally be caught above, but as a safeguard:
-        keyboard = [[InlineKeyboardButton("Try Again 📈", callback_data="token_stats")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await context.bot.send_message(
-            chat_id=user_id,
-            text="❌ Invalid input. Please enter a token symbol or contract address.",
-            reply_markup=reply_markup,
-        )
-        return
 
-    # Show pepe_sniper image with fetching text before Scoping stats
-    image_path = "assets/pepe_sniper.jpg"
-    image_msg = None
+# Per-user token bucket for stats lookups: refills at _LOOKUP_RATE per second
+# up to _LOOKUP_BURST; user_id -> (tokens, last_refill)
+_LOOKUP_RATE = 1.0
+_LOOKUP_BURST = 5
+_lookup_buckets = LRUDict(maxsize=100_000)
+
+
+def _take_lookup_token(user_id):
+    """Spends one lookup token for the user, returning False if none are left."""
+    now = time.monotonic()
+    tokens, last = _lookup_buckets.get(user_id, (_LOOKUP_BURST, now))
+    tokens = min(_LOOKUP_BURST, tokens + (now - last) * _LOOKUP_RATE)
+    allowed = tokens >= 1
+    _lookup_buckets[user_id] = (tokens - 1 if allowed else tokens, now)
+    return allowed
+
+
+async def _send_placeholder(context, user_id, caption):
+    """Sends the pepe_sniper "fetching" image, returning None if it fails."""
+    global _pepe_sniper_file_id
     try:
-        image_msg = await context.bot.send_photo(
+        msg = await context.bot.send_photo(
             chat_id=user_id,
-            photo=image_path,
-            caption=f"🔍 Scoping stats for {token_symbol} ({token_address[:6]}...{token_address[-4:]})...",
+            photo=_pepe_sniper_file_id or "assets/pepe_sniper.jpg",
+            caption=caption,
         )
     except Exception as e:
-        logger.warning(f"Failed to send image: {e}")
+        logger.warning("Failed to send image: %s", e)
+        return None
+    if _pepe_sniper_file_id is None and msg.photo:
+        _pepe_sniper_file_id = msg.photo[-1].file_id
+    return msg
+
+
+async def process_token(user_id: int, token_input: str, context: Application) -> None:
+    if not _take_lookup_token(user_id):
+        await context.bot.send_message(
+            chat_id=user_id,
+            text="⏳ Too many lookups at once. Please wait a moment and try again.",
+            reply_markup=_TRY_AGAIN_MARKUP,
+        )
+        return "rate_limited"
+    await context.bot.send_chat_action(chat_id=user_id, action=ChatAction.TYPING)
+    token_address, token_symbol = _classify(token_input.strip())
+    if not token_address:
+        # Unknown symbol: inform user (prompt will be re-triggered by handler)
+        await context.bot.send_message(
+            chat_id=user_id, text=f"❌ Unknown token symbol: {token_symbol}."
+        )
+        return "unknown_symbol"
+
+    # Show pepe_sniper image with fetching text while the stats are fetched
+    image_task = asyncio.ensure_future(
+        _send_placeholder(
+            context,
+            user_id,
+            f"🔍 Scoping stats for {token_symbol} ({token_address[:6]}...{token_address[-4:]})...",
+        )
+    )
 
     # Fetch stats using the determined token_address
     try:
         # Assuming fetch_token_stats takes the address
-        data = await fetch_token_stats(token_address)
+        data = await singleflight(
+            f"token_stats:{token_address}", lambda: fetch_token_stats(token_address)
+        )
+        image_msg = await image_task
 
         # --- Updated Data Extraction ---
         price = data.get("price")
@@ -152,54 +219,41 @@ async def process_token(user_id: int, token_input: str, context: Application) ->
         logo_url = data.get("logoUrl")  # Extract logo URL
 
         # --- Calculate 24h Change ---
-        change_24h_percent = "N/A"
-        trend = "❓"
-        if price is not None and price_1d is not None and price_1d != 0:
-            try:
-                change = ((float(price) - float(price_1d)) / float(price_1d)) * 100
-                change_24h_percent = f"{change:,.2f}"  # Format as percentage string
-                if change > 0:
-                    trend = "🟢📈"
-                elif change < 0:
-                    trend = "🔴📉"
-                else:
-                    trend = "➡️"
-            except (ValueError, TypeError, ZeroDivisionError) as calc_err:
-                logger.warning(
-                    f"Could not calculate 24h change for {fetched_address}: {calc_err}"
-                )
-                change_24h_percent = "N/A"
-                trend = "❓"
+        price_f = _to_float(price)
+        price_1d_f = _to_float(price_1d)
+        if price_f is not None and price_1d_f:
+            change = (price_f - price_1d_f) / price_1d_f * 100
+            change_24h_percent = f"{change:,.2f}"  # Format as percentage string
+            if change > 0:
+                trend = "🟢📈"
+            elif change < 0:
+                trend = "🔴📉"
+            else:
+                trend = "➡️"
+        else:
+            change_24h_percent = "N/A"
+            trend = "❓"
         # --- End Calculate 24h Change ---
 
-        # Format numbers nicely
-        def format_num(n, precision=2, default="N/A"):
-            try:
-                if n is None:
-                    return default
-                return f"{float(n):,.{precision}f}"
-            except (ValueError, TypeError):
-                return default
-
         # --- Updated Formatting ---
         # Dynamically set price precision: 8 decimals if < 0.01, else 4
-        price_precision = 8 if price is not None and abs(float(price)) < 0.01 else 4
-        price_str = f"${format_num(price, precision=price_precision)}"  # Dynamic precision for price
-        volume_str = f"${format_num(volume_24h)}"
-        mc_str = f"${format_num(market_cap)}"
+        price_precision = 8 if price_f is not None and abs(price_f) < 0.01 else 4
+        price_str = _fmt(price_f, precision=price_precision)
         address_display = f"{fetched_address}" if fetched_address else "N/A"
         explorer_url = (
             f"https://vybe.fyi/tokens/{fetched_address}" if fetched_address else None
         )
 
         # --- Updated Response Text ---
-        response_text = (
-            f"📊 *{fetched_name} ({fetched_symbol}) Stats*\n"
-            f"   Address: `{address_display}`\n\n"
-            f"Price: *{price_str}*\n"
-            f"24h Change: *{change_24h_percent}% {trend}*\n"
-            f"24h Volume: *{volume_str}*\n"
-            f"Market Cap: *{mc_str}*\n"
+        response_text = _STATS_TEMPLATE.format(
+            name=fetched_name,
+            symbol=fetched_symbol,
+            address=address_display,
+            price=price_str,
+            change=change_24h_percent,
+            trend=trend,
+            volume=_fmt(volume_24h),
+            market_cap=_fmt(market_cap),
         )
         if explorer_url:
             response_text += f"\n[More details]({explorer_url})"
@@ -217,12 +271,8 @@ async def process_token(user_id: int, token_input: str, context: Application) ->
                     callback_data=f"show_top_holders_{fetched_address}",
                 ),
             ],
-            [
-                InlineKeyboardButton(
-                    "Check Another Token/Address 📈", callback_data="token_stats"
-                )
-            ],
-            [InlineKeyboardButton("Back to Main Menu 🔙", callback_data="start")],
+            _CHECK_ANOTHER_ROW,
+            _BACK_TO_MAIN_ROW,
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
 
@@ -238,7 +288,10 @@ async def process_token(user_id: int, token_input: str, context: Application) ->
                 )
             except Exception as photo_err:
                 logger.warning(
-                    f"Failed to send photo {logo_url} for {fetched_address}. Falling back to text. Error: {photo_err}"
+                    "Failed to send photo %s for %s. Falling back to text. Error: %s",
+                    logo_url,
+                    fetched_address,
+                    photo_err,
                 )
                 # Fallback to sending text message if photo fails
                 await context.bot.send_message(
@@ -259,33 +312,23 @@ async def process_token(user_id: int, token_input: str, context: Application) ->
 
         # Delete the image message in a stylish way
         if image_msg:
-            time.sleep(3)
-            try:
-                await context.bot.delete_message(
-                    chat_id=user_id, message_id=image_msg.message_id
-                )
-            except Exception as e:
-                logger.warning(f"Failed to delete image message: {e}")
+            delete_message_after(context, user_id, image_msg.message_id)
 
-    except requests.RequestException as e:
-        logger.error(f"Error fetching token data for {token_address}: {e}")
-        keyboard = [[InlineKeyboardButton("Try Again 📈", callback_data="token_stats")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error("Error fetching token data for %s: %s", token_address, e)
         await context.bot.send_message(
             chat_id=user_id,
             text=f"❌ Couldn't fetch token data for {token_symbol}. Try again later!",
-            reply_markup=reply_markup,
+            reply_markup=_TRY_AGAIN_MARKUP,
         )
     except Exception as e:
         logger.error(
-            f"An unexpected error occurred processing token {token_address}: {e}"
+            "An unexpected error occurred processing token %s: %s", token_address, e
         )
-        keyboard = [[InlineKeyboardButton("Try Again 📈", callback_data="token_stats")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
         await context.bot.send_message(
             chat_id=user_id,
             text="❌ An unexpected error occurred.",
-            reply_markup=reply_markup,
+            reply_markup=_TRY_AGAIN_MARKUP,
         )
 
 
@@ -293,19 +336,19 @@ async def get_token_stats(token_address: str):
     """Fetches and processes token statistics."""
     try:
         return await fetch_token_stats(token_address)
-    except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 404:
-            logger.warning(f"Token not found: {token_address}")
+    except aiohttp.ClientResponseError as e:
+        if e.status == 404:
+            logger.warning("Token not found: %s", token_address)
             return {"error": "Token not found", "status_code": 404}
         else:
-            logger.error(f"HTTP error fetching token stats for {token_address}: {e}")
-            return {"error": "API error", "status_code": e.response.status_code}
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Request error fetching token stats for {token_address}: {e}")
+            logger.error("HTTP error fetching token stats for %s: %s", token_address, e)
+            return {"error": "API error", "status_code": e.status}
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error("Request error fetching token stats for %s: %s", token_address, e)
         return {"error": "Request error"}
     except Exception as e:
         logger.exception(
-            f"Unexpected error fetching token stats for {token_address}: {e}"
+            "Unexpected error fetching token stats for %s: %s", token_address, e
         )
         return {"error": "Unexpected error"}
 
@@ -314,15 +357,15 @@ async def get_top_holders(token_address: str, count: int = 5):
     """Fetches top token holders."""
     try:
         return await fetch_top_token_holders(token_address, count)
-    except requests.exceptions.HTTPError as e:
-        logger.error(f"HTTP error fetching top holders for {token_address}: {e}")
-        return {"error": "API error", "status_code": e.response.status_code}
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Request error fetching top holders for {token_address}: {e}")
+    except aiohttp.ClientResponseError as e:
+        logger.error("HTTP error fetching top holders for %s: %s", token_address, e)
+        return {"error": "API error", "status_code": e.status}
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error("Request error fetching top holders for %s: %s", token_address, e)
         return {"error": "Request error"}
     except Exception as e:
         logger.exception(
-            f"Unexpected error fetching top holders for {token_address}: {e}"
+            "Unexpected error fetching top holders for %s: %s", token_address, e
         )
         return {"error": "Unexpected error"}
 
@@ -336,7 +379,9 @@ async def format_token_stats_message(token_address: str) -> str:
     top_holders_data = await get_top_holders(token_address, 5)
     if not top_holders_data or top_holders_data.get("error"):
         logger.warning(
-            f"Could not fetch top holders for {token_address}: {top_holders_data.get('error', 'Unknown error')}"
+            "Could not fetch top holders for %s: %s",
+            token_address,
+            top_holders_data.get("error", "Unknown error"),
         )
         holders_table_str = "Top holders data is currently unavailable."
     else:
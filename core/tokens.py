@@ -0,0 +1,60 @@
+import re
+import sys
+from types import MappingProxyType
+
+try:
+    from solders.pubkey import Pubkey
+except ImportError:  # solders is optional; is_solana_address decodes in Python
+    Pubkey = None
+
+# Token symbol to Solana token address mapping (read-only, interned keys)
+TOKEN_ADDRESS_MAP = {
+    "SOL": "So11111111111111111111111111111111111111112",  # Solana (Wrapped SOL)
+    "USDC": "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v",  # USD Coin
+    "USDT": "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB",  # Tether USD
+    "BONK": "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263",  # Bonk
+    "WIF": "EKpQGSJtjMFqKZ9KQanSqYXRcF8fBopzLHYxdM65zcjm",  # dogwifhat
+    "PYTH": "HZ1JovNiVvGrGNiiYvEozEVgZ58xaU3RKwX8eACQBCt3",  # Pyth Network
+    "JTO": "jtojtomepa8beP8AuQc6eXt5FriJwfFMwQx2v2f9mCL",  # Jito
+    "RNDR": "rndrizKT3MK1iimdxRdWabcF7Zg7AR5T4nud4EkHBof",  # Render Token (SPL)
+    "HNT": "hntyVP6YFm1Hg25TN9WGLqM12b8TQmcknKrdu1oxWux",  # Helium
+    "TRUMP": "6p6xgHyF7AeE6TZkSmFsko444wqoP15icUSqi2jfGiPN",  # OFFICIAL TRUMP
+    # Add more mappings here as needed
+}
+TOKEN_ADDRESS_MAP = MappingProxyType(
+    {sys.intern(symbol): address for symbol, address in TOKEN_ADDRESS_MAP.items()}
+)
+
+# Reverse lookup so known addresses display their symbol without an API call
+ADDRESS_TO_SYMBOL = MappingProxyType(
+    {address: symbol for symbol, address in TOKEN_ADDRESS_MAP.items()}
+)
+
+# Base58 mint address: 32-44 chars, no 0/O/I/l
+BASE58_ADDRESS_RE = re.compile(r"^[1-9A-HJ-NP-Za-km-z]{32,44}$")
+
+_BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_BASE58_INDEX = {c: i for i, c in enumerate(_BASE58_ALPHABET)}
+_BASE58_CHARS = frozenset(_BASE58_ALPHABET)
+
+
+def is_solana_address(address):
+    """True if ``address`` is base58 that decodes to a 32-byte public key.
+
+    An alphabet and length check alone lets through strings that aren't keys,
+    which would otherwise cost a failed API round trip.
+    """
+    if not 32 <= len(address) <= 44 or not _BASE58_CHARS.issuperset(address):
+        return False
+    if Pubkey is not None:
+        try:
+            Pubkey.from_string(address)
+        except ValueError:
+            return False
+        return True
+    n = 0
+    for c in address:
+        n = n * 58 + _BASE58_INDEX[c]
+    # Leading "1"s encode leading zero bytes
+    leading_zeros = len(address) - len(address.lstrip("1"))
+    return leading_zeros + (n.bit_length() + 7) // 8 == 32
@@ -9,19 +9,17 @@ def format_top_holders_text(top_holders):
     if not top_holders:
         return "No top holders data available."
 
-    lines = ["🏆 <b>Top Token Holders:</b>"]
-    for holder in top_holders:
-        rank = holder.get("rank", "-")
-        owner = holder.get("ownerName") or holder.get("ownerAddress")
-        balance = f"{float(holder.get('balance', 0)):.2f}"
-        value_usd = f"${float(holder.get('valueUsd', 0)):,.2f}"
-        percent = f"{float(holder.get('percentageOfSupplyHeld', 0)):.4f}%"
-        symbol = holder.get("tokenSymbol", "-")
-        line = (
-            f"<b>#{rank}</b> 👤 <b>Owner:</b> {owner}\n"
-            f"   💰 <b>Balance:</b> {balance} <b>{symbol}</b> \n"
-            f"   💵 <b>Value:</b> {value_usd}\n"
-            f"   📊 <b>Supply:</b> {percent}\n"
-        )
-        lines.append(line)
-    return "\n".join(lines)
+    return _HEADER + "\n".join(map(_format_holder, top_holders))
+
+
+_HEADER = "🏆 <b>Top Token Holders:</b>\n"
+
+
+def _format_holder(holder):
+    g = holder.get
+    return (
+        f"<b>#{g('rank', '-')}</b> 👤 <b>Owner:</b> {g('ownerName') or g('ownerAddress')}\n"
+        f"   💰 <b>Balance:</b> {float(g('balance', 0)):.2f} <b>{g('tokenSymbol', '-')}</b> \n"
+        f"   💵 <b>Value:</b> ${float(g('valueUsd', 0)):,.2f}\n"
+        f"   📊 <b>Supply:</b> {float(g('percentageOfSupplyHeld', 0)):.4f}%\n"
+    )
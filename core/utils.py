@@ -1,99 +1,272 @@
+import asyncio
+import json
 import logging
-from datetime import datetime
-from decimal import Decimal, InvalidOperation
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import lru_cache
 
 from api import fetch_token_stats  # ADDED IMPORT
+from core.singleflight import singleflight
 
 logger = logging.getLogger(__name__)
 
 
+class LRUDict(OrderedDict):
+    """A dict holding at most ``maxsize`` entries. Setting a key marks it as
+    most recently used; once full, the least recently set key is evicted.
+    Used for per-user state keyed by Telegram user ids, which are unbounded.
+    """
+
+    def __init__(self, maxsize=100_000):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+
+
+# Telegram's legacy Markdown only lets _ * ` [ be backslash-escaped, and only
+# outside an entity, so this is for API-supplied text placed in plain runs
+_MD_ESCAPE_TABLE = str.maketrans({c: "\\" + c for c in "_*`["})
+
+
+def escape_markdown(text) -> str:
+    """Escapes legacy-Markdown control characters in ``text``."""
+    return str(text).translate(_MD_ESCAPE_TABLE)
+
+
+async def _delete_after(bot, chat_id, message_id, delay):
+    await asyncio.sleep(delay)
+    try:
+        await bot.delete_message(chat_id=chat_id, message_id=message_id)
+    except Exception as e:
+        logger.warning("Failed to delete message %s: %s", message_id, e)
+
+
+def delete_message_after(context, chat_id, message_id, delay=3):
+    """Deletes a message after ``delay`` seconds in a background task, so the
+    calling handler returns immediately instead of waiting out the delay.
+    """
+    context.application.create_task(
+        _delete_after(context.bot, chat_id, message_id, delay)
+    )
+
+
+# Token symbols don't change, so they're kept far longer than full stats and
+# persisted across restarts
+SYMBOL_TTL_SECONDS = 7 * 24 * 3600
+SYMBOL_CACHE_MAX = 50_000
+SYMBOL_CACHE_FILE = os.path.join(os.path.dirname(__file__), "..", "token_symbols.json")
+
+
+def _load_symbol_cache():
+    """Reads the persisted mint -> [expires_at, symbol] map into a bounded
+    LRUDict, dropping expired entries. A missing or malformed file is treated
+    as an empty cache.
+    """
+    cache = LRUDict(maxsize=SYMBOL_CACHE_MAX)
+    try:
+        with open(SYMBOL_CACHE_FILE, "r") as f:
+            entries = json.load(f)
+        now = time.time()
+        for mint, (expires_at, symbol) in entries.items():
+            if isinstance(symbol, str) and float(expires_at) > now:
+                cache[mint] = (float(expires_at), symbol)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning("Ignoring unreadable token symbol cache: %s", e)
+        cache.clear()
+    return cache
+
+
+def save_token_symbol_cache():
+    """Writes the symbol cache to disk if it changed; called once on shutdown."""
+    global _symbol_cache_dirty
+    if not _symbol_cache_dirty:
+        return
+    tmp_path = SYMBOL_CACHE_FILE + ".tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(_symbol_cache, f)
+        os.replace(tmp_path, SYMBOL_CACHE_FILE)
+        _symbol_cache_dirty = False
+    except OSError as e:
+        logger.warning("Failed to persist token symbol cache: %s", e)
+
+
+# mint -> (expires_at, symbol), expires_at in wall-clock seconds
+_symbol_cache = _load_symbol_cache()
+_symbol_cache_dirty = False
+
+
 async def get_token_symbol(token_address: str) -> str:  # Changed
     """Fetches the token symbol for a given token address."""
+    global _symbol_cache_dirty
+    cached = _symbol_cache.get(token_address)
+    if cached and cached[0] > time.time():
+        return cached[1]
     try:
-        token_data = await fetch_token_stats(token_address)  # Changed
-        return token_data.get("symbol", "Unknown Token")
+        # Same key as the token stats screen, so concurrent lookups of one mint
+        # (from either path) share a single request
+        token_data = await singleflight(
+            f"token_stats:{token_address}", lambda: fetch_token_stats(token_address)
+        )
     except Exception as e:
-        logger.error(f"Error fetching token symbol for {token_address}: {e}")
+        logger.error("Error fetching token symbol for %s: %s", token_address, e)
         return "Unknown Token"
+    symbol = token_data.get("symbol", "Unknown Token")
+    _symbol_cache[token_address] = (time.time() + SYMBOL_TTL_SECONDS, symbol)
+    _symbol_cache_dirty = True
+    return symbol
 
 
-async def format_transaction_details(tx: dict, wallet_address: str) -> str:  # Changed
+async def resolve_token_symbols(transactions) -> dict:
+    """Looks up symbols for the distinct mints in ``transactions`` concurrently,
+    returning ``{mint: symbol}`` for use as format_transaction_details' symbol_map.
+    """
+    mints = list(
+        {
+            tx["mintAddress"]
+            for tx in transactions
+            if tx.get("mintAddress") and not tx.get("symbol")
+        }
+    )
+    symbols = await asyncio.gather(*(get_token_symbol(m) for m in mints))
+    return dict(zip(mints, symbols))
+
+
+async def format_transaction_details(
+    tx: dict, wallet_address: str, symbol_map: dict = None
+) -> str:  # Changed
     """Formats the details of a single transaction dictionary into a readable string,
-    tailored to the perspective of the given wallet_address.
+    tailored to the perspective of the given wallet_address. Pass a symbol_map from
+    resolve_token_symbols when formatting several transactions.
+    """
+    # NEW LOGIC for symbol and amount_display
+    symbol = tx.get("symbol")
+    mint_address = tx.get("mintAddress")
+    if not symbol and symbol_map and mint_address in symbol_map:
+        symbol = symbol_map[mint_address]
+    elif not symbol and mint_address:
+        try:
+            symbol = await get_token_symbol(mint_address)  # Changed
+        except Exception:
+            # If get_token_symbol fails, proceed to fallback (USD value)
+            symbol = None
+
+    return _format_transaction(
+        tx.get("signature", "N/A"),
+        wallet_address,
+        tx.get("valueUsd", "0"),
+        tx.get("blockTime"),
+        tx.get("senderAddress", "N/A"),
+        tx.get("receiverAddress", "N/A"),
+        tx.get("calculatedAmount", "N/A"),
+        symbol,
+    )
+
+
+async def format_transaction_alert(
+    tx: dict, wallet_address: str, symbol_map: dict = None
+) -> str:
+    """Formats a tracked-wallet notification: the alert header followed by the
+    body from format_transaction_details.
+    """
+    header = f"🚨 *New Transaction Detected!*\n\n💼 *Wallet:* `{wallet_address}`\n\n"
+    return header + await format_transaction_details(tx, wallet_address, symbol_map)
+
+
+@lru_cache(maxsize=4096)
+def _fmt_ts(seconds: int) -> str:
+    """Renders a Unix timestamp (blockTime) in UTC; transactions in one page
+    often share a second, so repeats are cache hits.
+    """
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).strftime(
+        "%Y-%m-%d %H:%M:%S UTC"
+    )
+
+
+# Message skeletons for _format_transaction
+_TX_TEMPLATE = (
+    "⏰ *Time:* {time}\n"
+    "💰 *Value (USD):* {value}\n"
+    "{perspective}"
+    "🔗 *Solscan:* [{signature_short}]({link})\n"
+)
+_SENT_TEMPLATE = "📤 *{wallet} sent:* {amount} to `{counterparty}`\n"
+_RECEIVED_TEMPLATE = "📥 *{wallet} received:* {amount} from `{counterparty}`\n"
+_PARTIES_TEMPLATE = "📤 *Sender:* `{sender}`\n📥 *Receiver:* `{receiver}`\n"
+
+
+@lru_cache(maxsize=4096)
+def _format_transaction(
+    signature,
+    wallet_address,
+    value_usd_str,
+    block_time,
+    sender,
+    receiver,
+    amount_str,
+    symbol,
+):
+    """Renders the transaction text from hashable fields so that re-rendering the
+    same transaction (e.g. a repeated recent-transactions view) is a cache hit.
     """
     try:
-        # Safely convert valueUsd to Decimal for formatting
-        value_usd_str = tx.get("valueUsd", "0")
-        value_usd = Decimal(value_usd_str) if value_usd_str else Decimal("0")
+        # valueUsd is display-only, so a float is precise enough
+        value_usd = float(value_usd_str) if value_usd_str else 0.0
         # Format currency
         formatted_value = (
             f"${value_usd:,.2f}"  # Format with commas and 2 decimal places
         )
-    except (InvalidOperation, TypeError):
-        formatted_value = (
-            f"${tx.get('valueUsd', 'N/A')}"  # Fallback if conversion fails
-        )
+    except (ValueError, TypeError):
+        formatted_value = f"${value_usd_str}"  # Fallback if conversion fails
 
     # Parse block time if available
-    block_time = tx.get("blockTime")
     formatted_time = "N/A"
     if block_time:
         try:
-            # Convert blockTime (usually Unix timestamp) to datetime
-            dt = datetime.fromtimestamp(block_time)
-            formatted_time = dt.strftime("%Y-%m-%d %H:%M:%S")
-        except (TypeError, ValueError):
+            formatted_time = _fmt_ts(int(block_time))
+        except (TypeError, ValueError, OverflowError, OSError):
             formatted_time = "N/A"
 
-    # Safely get other fields with fallbacks
-    signature = tx.get("signature", "N/A")
-    sender = tx.get("senderAddress", "N/A")
-    receiver = tx.get("receiverAddress", "N/A")
     # Construct the Solana Explorer link for the signature
     explorer_link = (
         f"https://solscan.io/tx/{signature}" if signature != "N/A" else "N/A"
     )
 
-    # NEW LOGIC for symbol and amount_display
-    amount_str = tx.get("calculatedAmount", "N/A")
-    symbol_from_tx = tx.get("symbol")
-    mint_address = tx.get("mintAddress")
-
-    final_symbol = None
-    final_symbol_known = False
-
-    if symbol_from_tx:
-        final_symbol = symbol_from_tx
-        final_symbol_known = True
-    elif mint_address:
-        try:
-            final_symbol = await get_token_symbol(mint_address)  # Changed
-            if final_symbol:
-                final_symbol_known = True
-        except Exception:
-            # If get_token_symbol fails, proceed to fallback (USD value)
-            pass
-
-    if final_symbol_known and amount_str != "N/A":
-        amount_display = f"{amount_str} {final_symbol}"
+    if symbol and amount_str != "N/A":
+        amount_display = f"{amount_str} {escape_markdown(symbol)}"
     else:
         amount_display = formatted_value  # Fallback to USD value
 
     # Determine if the wallet is sender or receiver
-    transaction_perspective = ""
-    if sender == wallet_address:
-        transaction_perspective = f"📤 *{wallet_address[:6]}...{wallet_address[-4:]} sent:* {amount_display} to `{receiver}`\n"
-    elif receiver == wallet_address:
-        transaction_perspective = f"📥 *{wallet_address[:6]}...{wallet_address[-4:]} received:* {amount_display} from `{sender}`\n"
+    if sender == wallet_address or receiver == wallet_address:
+        short_wallet = f"{wallet_address[:6]}...{wallet_address[-4:]}"
+        if sender == wallet_address:
+            transaction_perspective = _SENT_TEMPLATE.format(
+                wallet=short_wallet, amount=amount_display, counterparty=receiver
+            )
+        else:
+            transaction_perspective = _RECEIVED_TEMPLATE.format(
+                wallet=short_wallet, amount=amount_display, counterparty=sender
+            )
     else:
         # Fallback if the wallet_address is neither sender nor receiver (should not happen in normal flow)
-        transaction_perspective = (
-            f"📤 *Sender:* `{sender}`\n📥 *Receiver:* `{receiver}`\n"
+        transaction_perspective = _PARTIES_TEMPLATE.format(
+            sender=sender, receiver=receiver
         )
 
-    return (
-        f"⏰ *Time:* {formatted_time}\n"
-        f"💰 *Value (USD):* {formatted_value}\n"
-        f"{transaction_perspective}"  # Use the new perspective string
-        f"🔗 *Solscan:* [{signature[:8]}...{signature[-8:]}]({explorer_link})\n"
+    return _TX_TEMPLATE.format(
+        time=formatted_time,
+        value=formatted_value,
+        perspective=transaction_perspective,
+        signature_short=f"{signature[:8]}...{signature[-8:]}",
+        link=explorer_link,
     )
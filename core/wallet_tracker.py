@@ -1,28 +1,205 @@
+import asyncio
+import json
 import logging
 import os
-import re
 import time
 from datetime import datetime, timedelta
 
-import requests
+import aiohttp
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.constants import ChatAction
-from telegram.ext import Application
-
-from api import fetch_wallet_activity, get_wallet_token_balance
+from telegram.ext import Application, CallbackContext
+
+try:
+    from fastnumbers import fast_float
+except ImportError:  # fastnumbers is optional; _safe_float falls back to float()
+    fast_float = None
+
+from api import (
+    fetch_wallet_activity,
+    fetch_wallet_activity_batch,
+    get_wallet_token_balance,
+    with_retry,
+)
 
-from .dashboard import _load_dashboard, add_tracked_wallet, get_user_dashboard
-from .utils import format_transaction_details
+from .dashboard import _load_dashboard_ro, _wallet_subscribers, add_tracked_wallet
+from .singleflight import singleflight
+from .tokens import is_solana_address
+from .utils import (
+    delete_message_after,
+    escape_markdown,
+    format_transaction_alert,
+    format_transaction_details,
+    resolve_token_symbols,
+)
 
 logger = logging.getLogger(__name__)
 
+# Static keyboard pieces; only rows embedding a wallet address are built per call
+_BACK_TO_MAIN_ROW = [
+    InlineKeyboardButton("Back to Main Menu 🔙", callback_data="start")
+]
+_TRACK_ANOTHER_ROW = [
+    InlineKeyboardButton("Track Another Wallet 🔍", callback_data="wallet_tracker")
+]
+_FALLBACK_MARKUP = InlineKeyboardMarkup([_TRACK_ANOTHER_ROW, _BACK_TO_MAIN_ROW])
+_RETRY_MARKUP = InlineKeyboardMarkup(
+    [[InlineKeyboardButton("Try Again 🔍", callback_data="wallet_tracker")]]
+)
+
 
 WALLET_TRACKING_INTERVAL_SECONDS = int(
     os.getenv("WALLET_TRACKING_INTERVAL_SECONDS", 60)
 )
 
-# Dictionary to store the latest transaction timestamp for each wallet
-last_transaction_times = {}
+# Max wallets checked concurrently per tracking tick
+WALLET_CHECK_CONCURRENCY = 10
+
+# Max new transactions alerted per wallet per tick; older extras are skipped
+MAX_ALERTS_PER_WALLET = 10
+
+# Last-seen transaction times are persisted by the tracking job whenever they
+# change (and on shutdown) so a restart or crash doesn't re-announce
+# transactions users were already notified about
+LAST_TX_TIMES_FILE = os.path.join(
+    os.path.dirname(__file__), "..", "last_transaction_times.json"
+)
+
+
+def _load_last_transaction_times():
+    """Reads the persisted wallet -> block time map; a missing or malformed
+    file is treated as empty.
+    """
+    try:
+        with open(LAST_TX_TIMES_FILE, "r") as f:
+            return {
+                wallet: int(block_time) for wallet, block_time in json.load(f).items()
+            }
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.warning("Ignoring unreadable last transaction times: %s", e)
+        return {}
+
+
+def save_last_transaction_times():
+    global _last_tx_times_dirty
+    tmp_path = LAST_TX_TIMES_FILE + ".tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(last_transaction_times, f)
+        os.replace(tmp_path, LAST_TX_TIMES_FILE)
+        _last_tx_times_dirty = False
+    except OSError as e:
+        logger.warning("Failed to persist last transaction times: %s", e)
+
+
+# Latest transaction timestamp seen for each wallet. Entries live as long as
+# someone tracks the wallet; the tracking job prunes the rest each tick
+last_transaction_times = _load_last_transaction_times()
+_last_tx_times_dirty = False
+
+# Quiet wallets are polled less often: after WALLET_BACKOFF_GRACE_POLLS polls
+# with nothing new, the gap doubles per further quiet poll, up to the cap
+WALLET_BACKOFF_GRACE_POLLS = 3
+WALLET_BACKOFF_MAX_SECONDS = 600
+# wallet -> (quiet polls in a row, monotonic time of next poll, wall-clock
+# time the last successful poll's window ended); pruned like
+# last_transaction_times
+_poll_state = {}
+
+
+def _prune_untracked(subscribers):
+    """Drops tracker state for wallets nobody tracks any more. Stale entries
+    left in the saved file are harmless, so this doesn't force a save.
+    """
+    for wallet_address in [w for w in last_transaction_times if w not in subscribers]:
+        del last_transaction_times[wallet_address]
+    for wallet_address in [w for w in _poll_state if w not in subscribers]:
+        del _poll_state[wallet_address]
+
+
+def _record_poll(wallet_address, had_new, tick_started, polled_at):
+    misses = 0 if had_new else _poll_state.get(wallet_address, (0,))[0] + 1
+    delay = WALLET_TRACKING_INTERVAL_SECONDS
+    if misses > WALLET_BACKOFF_GRACE_POLLS:
+        delay = min(
+            delay * 2 ** (misses - WALLET_BACKOFF_GRACE_POLLS),
+            WALLET_BACKOFF_MAX_SECONDS,
+        )
+    # Half a tick of slack so scheduler jitter doesn't push a wallet that is
+    # due into the following tick
+    next_check = tick_started + delay - WALLET_TRACKING_INTERVAL_SECONDS / 2
+    _poll_state[wallet_address] = (misses, next_check, polled_at)
+
+
+def _safe_float(value, default=None):
+    """Parses an API number, returning default if it is missing or malformed.
+
+    Strings are parsed by fastnumbers when it is installed; otherwise plain
+    decimal strings skip the try/except and anything else falls back to it.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        if fast_float is not None:
+            return fast_float(value, on_fail=default)
+        digits = (value[1:] if value[:1] == "-" else value).replace(".", "", 1)
+        if digits.isascii() and digits.isdigit():
+            return float(value)
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return default
+
+
+# Token prices get 6 decimals with trailing zeros trimmed. The two rstrip
+# calls are deliberate: rstrip("0.") would also eat integer zeros ($10 -> $1)
+_PRICE_FMT = "${:,.6f}".format
+
+
+# Holdings worth less than this are summarised in one line instead of listed
+DUST_VALUE_USD = 0.01
+
+
+def _fmt_token(token, value_usd):
+    """Formats one entry of a wallet's token balances for the tracking message.
+    ``value_usd`` is the token's already-parsed valueUsd (None if malformed).
+    """
+    get = token.get
+    amount_str = get("amount", "0")
+    amount = _safe_float(amount_str)
+    if amount is None:
+        amount_formatted = amount_str
+    elif amount.is_integer():
+        amount_formatted = f"{int(amount):,}"
+    else:
+        amount_formatted = f"{amount:,}"
+
+    value_usd_formatted = "N/A" if value_usd is None else f"${value_usd:,.2f}"
+
+    price_usd = _safe_float(get("priceUsd", "N/A"))
+    price_usd_formatted = (
+        "N/A" if price_usd is None else _PRICE_FMT(price_usd).rstrip("0").rstrip(".")
+    )
+
+    return (
+        f"\n--- *{get('symbol', 'N/A')}* "
+        f"({escape_markdown(get('name', 'Unknown Token'))}) ---\n"
+        f"   🔢 *Amount:* {amount_formatted}\n"
+        f"   💲 *Value:* {value_usd_formatted} USD\n"
+        f"   📈 *Price:* {price_usd_formatted}\n"
+    )
+
+
+WALLET_PROMPT_TEXT = (
+    "🔍 Enter a Solana wallet address to track its activity (e.g., 3qArN...):"
+)
+# Replies for the process_wallet statuses that mean the input itself was bad
+WALLET_INPUT_ERRORS = {
+    "validation_error": "❌ Invalid Solana wallet address format. Please ensure it is a valid Solana address (e.g., 3qArN...).",
+    "empty_input": "❌ Wallet address cannot be empty! Please enter a valid Solana address.",
+}
 
 
 # Check wallet activity (Prompt)
@@ -42,12 +219,23 @@ async def wallet_prompt(
         await query.answer()
 
     user_id = user.id
-    await message.reply_text(
-        "🔍 Enter a Solana wallet address to track its activity (e.g., 3qArN...):"
-    )
+    await message.reply_text(WALLET_PROMPT_TEXT)
     user_states[user_id] = "awaiting_wallet"
 
 
+async def _send_placeholder(context, user_id, wallet_address):
+    """Sends the wallet tracking "fetching" image, returning None if it fails."""
+    try:
+        return await context.bot.send_photo(
+            chat_id=user_id,
+            photo="assets/wallet_tracking_pepe.jpg",
+            caption=f"⏳ Finding token balances for wallet `{wallet_address[:6]}...`",
+        )
+    except Exception as e:
+        logger.warning("Failed to send image: %s", e)
+        return None
+
+
 async def process_wallet(
     user_id: int, wallet_address: str, context: Application
 ) -> str:  # Returns status string
@@ -56,25 +244,24 @@ async def process_wallet(
     if not wallet_address:
         return "empty_input"  # Caller handles message and re-prompt
 
-    # Basic validation for Solana wallet address
-    if not re.match(r"^[1-9A-HJ-NP-Za-km-z]{32,44}$", wallet_address):
+    # Validate the Solana wallet address: base58 that decodes to 32 bytes
+    if not is_solana_address(wallet_address):
         return "validation_error"  # Caller handles message and re-prompt
 
-    # Send image with caption before fetching balances
-    image_path = "assets/wallet_tracking_pepe.jpg"
-    image_msg = None
     try:
-        image_msg = await context.bot.send_photo(
-            chat_id=user_id,
-            photo=image_path,
-            caption=f"⏳ Finding token balances for wallet `{wallet_address[:6]}...`",
+        # Send the placeholder image while the balances are fetched; the
+        # placeholder helper never raises, so only the fetch can fail
+        image_msg, balance_data = await asyncio.gather(
+            _send_placeholder(context, user_id, wallet_address),
+            # Concurrent lookups of the same wallet share one request
+            singleflight(
+                f"wallet_balance:{wallet_address}",
+                lambda: with_retry(lambda: get_wallet_token_balance(wallet_address)),
+            ),
+            return_exceptions=True,
         )
-    except Exception as e:
-        logger.warning(f"Failed to send image: {e}")
-
-    try:
-        # Call the balance function
-        balance_data = await get_wallet_token_balance(wallet_address)
+        if isinstance(balance_data, BaseException):
+            raise balance_data
 
         # --- Extract Core Information ---
         total_value_usd_str = balance_data.get("totalTokenValueUsd", "0")
@@ -83,44 +270,36 @@ async def process_wallet(
         tokens = balance_data.get("data", [])
 
         # --- Safely Convert Numbers ---
-        total_value_usd = 0.0
-        total_value_change_formatted = ""
-
-        try:
-            total_value_usd = float(total_value_usd_str)
-        except (ValueError, TypeError):
+        total_value_usd = _safe_float(total_value_usd_str)
+        if total_value_usd is None:
             logger.warning(
-                f"Could not convert totalTokenValueUsd '{total_value_usd_str}' to float for wallet {wallet_address}. Defaulting to 0."
+                "Could not convert totalTokenValueUsd '%s' to float for wallet %s. Defaulting to 0.",
+                total_value_usd_str,
+                wallet_address,
             )
+            total_value_usd = 0.0
 
-        try:
-            total_value_change_1d = float(total_value_change_1d_str)
+        total_value_change_1d = _safe_float(total_value_change_1d_str)
+        if total_value_change_1d is None:
+            logger.warning(
+                "Could not convert totalTokenValueUsd1dChange '%s' to float for wallet %s.",
+                total_value_change_1d_str,
+                wallet_address,
+            )
+            total_value_change_formatted = ""  # Don't show if invalid
+        else:
             change_sign = "+" if total_value_change_1d >= 0 else ""
             change_emoji = "📈" if total_value_change_1d >= 0 else "📉"
             total_value_change_formatted = (
                 f"{change_emoji} {change_sign}${total_value_change_1d:,.2f} (24h)"
             )
-        except (ValueError, TypeError):
-            logger.warning(
-                f"Could not convert totalTokenValueUsd1dChange '{total_value_change_1d_str}' to float for wallet {wallet_address}."
-            )
-            total_value_change_formatted = ""  # Don't show if invalid
 
         # --- Handle No Tokens Case ---
         if not tokens and total_value_usd == 0.0:
-            keyboard = [
-                [
-                    InlineKeyboardButton(
-                        "Track Another Wallet 🔍", callback_data="wallet_tracker"
-                    )
-                ],
-                [InlineKeyboardButton("Back to Main Menu 🔙", callback_data="start")],
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
             await context.bot.send_message(
                 chat_id=user_id,
                 text=f"🤷‍♂️ No token balances found for wallet `{wallet_address}`.",
-                reply_markup=reply_markup,
+                reply_markup=_FALLBACK_MARKUP,
                 parse_mode="Markdown",
             )
             # Wallet is valid but no tokens, still "processed" in terms of validation
@@ -129,62 +308,33 @@ async def process_wallet(
             return "processed_successfully_no_tokens"
 
         # --- Build the Message ---
-        message_text = "✅ Successfully Started Tracking!\n"
-        message_text += f"💼 *Wallet:* `{wallet_address}`\n\n"
-        message_text += f"💰 *Total Value:* ${total_value_usd:,.2f} USD\n"
+        parts = [
+            "✅ Successfully Started Tracking!\n",
+            f"💼 *Wallet:* `{wallet_address}`\n\n",
+            f"💰 *Total Value:* ${total_value_usd:,.2f} USD\n",
+        ]
         if total_value_change_formatted:
-            message_text += f"📊 *Change (24h):* {total_value_change_formatted}\n"
-        message_text += f"🪙 *Token Count:* {token_count}\n\n"
-        message_text += "✨ *Tokens Held:*\n"
+            parts.append(f"📊 *Change (24h):* {total_value_change_formatted}\n")
+        parts.append(f"🪙 *Token Count:* {token_count}\n\n")
+        parts.append("✨ *Tokens Held:*\n")
 
         if not tokens:
-            message_text += (
-                "- No specific token data available (might only have SOL).\n"
-            )
+            parts.append("- No specific token data available (might only have SOL).\n")
         else:
+            # Parse each value once; dust is counted and skipped before any
+            # formatting. Tokens with an unparseable value are still listed
+            dust = 0
             for token in tokens:
-                symbol = token.get("symbol", "N/A")
-                name = token.get("name", "Unknown Token")
-                amount_str = token.get("amount", "0")
-                value_usd_str = token.get("valueUsd", "0")
-                price_usd_str = token.get("priceUsd", "N/A")
-
-                # Initialize formatted strings
-                amount_formatted = amount_str  # Fallback
-                value_usd_formatted = "N/A"
-                price_usd_formatted = "N/A"
-
-                # Format amount (display raw value with commas)
-                try:
-                    amount_float = float(amount_str)
-                    if amount_float == int(amount_float):
-                        amount_formatted = f"{int(amount_float):,}"
-                    else:
-                        amount_formatted = f"{amount_float:,}"
-                except (ValueError, TypeError):
-                    pass
-
-                # Format current value
-                try:
-                    value_usd_float = float(value_usd_str)
-                    value_usd_formatted = f"${value_usd_float:,.2f}"
-                except (ValueError, TypeError):
-                    pass
-
-                # Format current price
-                try:
-                    price_usd_float = float(price_usd_str)
-                    price_usd_formatted = f"${price_usd_float:,.6f}".rstrip("0").rstrip(
-                        "."
-                    )
-                except (ValueError, TypeError):
-                    pass
-
-                message_text += f"\n--- *{symbol}* ({name}) ---\n"
-                message_text += f"   🔢 *Amount:* {amount_formatted}\n"
-                message_text += f"   💲 *Value:* {value_usd_formatted} USD"
-                message_text += f"\n   📈 *Price:* {price_usd_formatted}"
-                message_text += "\n"
+                value_usd = _safe_float(token.get("valueUsd", "0"))
+                if value_usd is not None and value_usd < DUST_VALUE_USD:
+                    dust += 1
+                    continue
+                parts.append(_fmt_token(token, value_usd))
+            if dust:
+                parts.append(
+                    f"\n_+{dust} more token(s) worth under ${DUST_VALUE_USD} hidden_\n"
+                )
+        message_text = "".join(parts)
 
         add_tracked_wallet(user_id, wallet_address)
 
@@ -195,12 +345,8 @@ async def process_wallet(
                     callback_data=f"remove_wallet_{wallet_address}",
                 )
             ],
-            [
-                InlineKeyboardButton(
-                    "Track Another Wallet 🔍", callback_data="wallet_tracker"
-                )
-            ],
-            [InlineKeyboardButton("Back to Main Menu 🔙", callback_data="start")],
+            _TRACK_ANOTHER_ROW,
+            _BACK_TO_MAIN_ROW,
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         await context.bot.send_message(
@@ -211,162 +357,153 @@ async def process_wallet(
             disable_web_page_preview=True,
         )
         if image_msg:
-            time.sleep(3)  # Optional delay for better UX
-            try:
-                await context.bot.delete_message(
-                    chat_id=user_id, message_id=image_msg.message_id
-                )
-            except Exception as e:
-                logger.warning(f"Failed to delete image message: {e}")
+            delete_message_after(context, user_id, image_msg.message_id)
         return "processed_successfully"
 
-    except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 404:
-            keyboard = [
-                [
-                    InlineKeyboardButton(
-                        "Track Another Wallet 🔍", callback_data="wallet_tracker"
-                    )
-                ],
-                [InlineKeyboardButton("Back to Main Menu 🔙", callback_data="start")],
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+    except aiohttp.ClientResponseError as e:
+        if e.status == 404:
             await context.bot.send_message(
                 chat_id=user_id,
                 text=f"🤷‍♂️ No token balances found for wallet `{wallet_address}` (Wallet might be new or inactive).",
-                reply_markup=reply_markup,
+                reply_markup=_FALLBACK_MARKUP,
                 parse_mode="Markdown",
             )
         else:
-            logger.error(f"HTTP error fetching balance data for {wallet_address}: {e}")
-            keyboard = [
-                [InlineKeyboardButton("Try Again 🔍", callback_data="wallet_tracker")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            logger.error(
+                "HTTP error fetching balance data for %s: %s", wallet_address, e
+            )
             await context.bot.send_message(
                 chat_id=user_id,
                 text="❌ Couldn't fetch wallet balance data right now. Please ensure the API key is valid and the API is reachable.",
-                reply_markup=reply_markup,
+                reply_markup=_RETRY_MARKUP,
             )
         return "processing_failed_api"  # Wallet was valid, but API failed
-    except requests.RequestException as e:
-        logger.error(f"Network error fetching wallet data for {wallet_address}: {e}")
-        keyboard = [
-            [InlineKeyboardButton("Try Again 🔍", callback_data="wallet_tracker")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error("Network error fetching wallet data for %s: %s", wallet_address, e)
         await context.bot.send_message(
             chat_id=user_id,
             text="❌ Network error: Couldn't connect to the API. Please check your connection.",
-            reply_markup=reply_markup,
+            reply_markup=_RETRY_MARKUP,
         )
         return "processing_failed_api"  # Wallet was valid, but API failed
     except Exception as e:
         logger.exception(
-            f"An unexpected error occurred processing wallet {wallet_address}: {e}"
+            "An unexpected error occurred processing wallet %s: %s", wallet_address, e
         )  # Use logger.exception for stack trace
-        keyboard = [
-            [InlineKeyboardButton("Try Again 🔍", callback_data="wallet_tracker")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
         await context.bot.send_message(
             chat_id=user_id,
             text="❌ An unexpected error occurred. The developers have been notified.",
-            reply_markup=reply_markup,
+            reply_markup=_RETRY_MARKUP,
         )
         return "processing_failed_unexpected"  # Wallet was valid, but other error
 
 
-async def check_recent_transactions(wallet_address, user_id, application):
-    """
-    Check for recent transactions in the last 60 seconds for a specific wallet.
+def _tracking_start_date():
+    return int(
+        (
+            datetime.now() - timedelta(seconds=WALLET_TRACKING_INTERVAL_SECONDS)
+        ).timestamp()
+    )
 
-    Args:
-        wallet_address (str): The wallet address to check
-        user_id (int): The user ID who is tracking this wallet
-        application (Application): The telegram bot application object
+
+async def _process_new_transactions(
+    wallet_address, user_ids, recent_transactions, application, dashboard
+):
+    """Diffs freshly fetched activity against last_transaction_times once and
+    notifies every user in ``user_ids`` about the new transactions.
+    ``dashboard`` is a snapshot taken after the fetch, shared across wallets.
+    Returns True if the wallet had new transactions, False if not, and None
+    if they couldn't be rendered (the wallet's last-seen time is then left
+    alone so the next poll retries them).
     """
-    # Ensure wallet is still tracked
-    if wallet_address not in get_user_dashboard(user_id).get("wallets", []):
-        return
+    global _last_tx_times_dirty
+    # Ensure wallet is still tracked (wallets are sets, so this is O(1))
+    user_ids = [
+        user_id
+        for user_id in user_ids
+        if wallet_address in dashboard.get(str(user_id), {}).get("wallets", ())
+    ]
+    if not user_ids:
+        return False
     try:
-        start_date = int(
-            (
-                datetime.now() - timedelta(seconds=WALLET_TRACKING_INTERVAL_SECONDS)
-            ).timestamp()
-        )
-
-        # Get the last known transaction time for this wallet, or initialize it
-        global last_transaction_times
+        # Get the last known transaction time for this wallet (0 if unseen)
         last_tx_time = last_transaction_times.get(wallet_address, 0)
 
-        # Fetch recent wallet activity using our startDate
-        recent_transactions = await fetch_wallet_activity(
-            wallet_address, startDate=start_date
-        )
-
         if not recent_transactions:
-            logger.debug(f"No recent transactions found for wallet {wallet_address}")
-            return
+            logger.debug("No recent transactions found for wallet %s", wallet_address)
+            return False
 
         # Find new transactions - those with block time after our last recorded time
-        new_transactions = []
-        latest_block_time = last_tx_time
-
-        for tx in recent_transactions:
-            block_time = tx.get("blockTime", 0)
-
-            # Update our tracking of the latest transaction time
-            if block_time > latest_block_time:
-                latest_block_time = block_time
-
-            # Only include transactions that are newer than what we've seen before
-            if block_time > last_tx_time:
-                new_transactions.append(tx)
-
-        # Update the last transaction time for this wallet
-        if latest_block_time > last_tx_time:
-            last_transaction_times[wallet_address] = latest_block_time
-
-        # If we have new transactions, notify the user
-        if new_transactions:
-            logger.info(
-                f"Found {len(new_transactions)} new transactions for wallet {wallet_address}, processing the first one."
-            )
-
-            # Process only the first new transaction
-            first_tx = new_transactions[0]
-            tx_formatted = await format_transaction_details(first_tx, wallet_address)
-
-            # Create message text
-            message = "🚨 *New Transaction Detected!*\n\n"
-            message += f"💼 *Wallet:* `{wallet_address}`\n\n"
-            message += tx_formatted
-
-            # Create keyboard for the message
-            keyboard = [
-                [
-                    InlineKeyboardButton(
-                        "Remove Wallet 🗑️",
-                        callback_data=f"remove_wallet_{wallet_address}",
-                    )
-                ],
-                [InlineKeyboardButton("Back to Main Menu 🔙", callback_data="start")],
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+        new_transactions = [
+            tx for tx in recent_transactions if tx.get("blockTime", 0) > last_tx_time
+        ]
+        if not new_transactions:
+            return False
+        # Alert on up to MAX_ALERTS_PER_WALLET of the newest, oldest first
+        alert_transactions = new_transactions[:MAX_ALERTS_PER_WALLET][::-1]
+        logger.info(
+            "Found %s new transactions for wallet %s, notifying %s user(s) of %s.",
+            len(new_transactions),
+            wallet_address,
+            len(user_ids),
+            len(alert_transactions),
+        )
 
-            # Send the notification
-            await application.bot.send_message(
-                chat_id=user_id,
-                text=message,
-                reply_markup=reply_markup,
-                parse_mode="Markdown",
-                disable_web_page_preview=True,
+        # Render each alert once for all subscribers, resolving symbols together
+        symbol_map = await resolve_token_symbols(alert_transactions)
+        messages = await asyncio.gather(
+            *(
+                format_transaction_alert(tx, wallet_address, symbol_map)
+                for tx in alert_transactions
             )
+        )
     except Exception as e:
         logger.error(
-            f"Error checking recent transactions for wallet {wallet_address}: {str(e)}"
+            "Error checking recent transactions for wallet %s: %s", wallet_address, e
         )
+        return None
+
+    # Advance the last transaction time only once the alerts are ready
+    last_transaction_times[wallet_address] = max(
+        tx.get("blockTime", 0) for tx in new_transactions
+    )
+    _last_tx_times_dirty = True
+
+    # Create keyboard for the message
+    keyboard = [
+        [
+            InlineKeyboardButton(
+                "Remove Wallet 🗑️",
+                callback_data=f"remove_wallet_{wallet_address}",
+            )
+        ],
+        _BACK_TO_MAIN_ROW,
+    ]
+    reply_markup = InlineKeyboardMarkup(keyboard)
+
+    async def notify(user_id):
+        # Sequential within a chat so alerts arrive in order and stay under
+        # Telegram's per-chat rate limit
+        for message in messages:
+            try:
+                await application.bot.send_message(
+                    chat_id=user_id,
+                    text=message,
+                    reply_markup=reply_markup,
+                    parse_mode="Markdown",
+                    disable_web_page_preview=True,
+                )
+            except Exception as e:
+                logger.error(
+                    "Failed to send wallet alert for %s to user %s: %s",
+                    wallet_address,
+                    user_id,
+                    e,
+                )
+
+    # Send the notifications to every subscriber concurrently
+    await asyncio.gather(*map(notify, user_ids))
+    return True
 
 
 async def show_recent_transactions(
@@ -380,7 +517,10 @@ async def show_recent_transactions(
 
     try:
         # Fetch recent activity (both sent and received)
-        transactions = await fetch_wallet_activity(wallet_address)
+        transactions = await singleflight(
+            f"wallet_activity:{wallet_address}",
+            lambda: fetch_wallet_activity(wallet_address),
+        )
 
         if not transactions:
             await context.bot.send_message(
@@ -393,12 +533,19 @@ async def show_recent_transactions(
         # Limit to the latest 5 transactions for brevity
         latest_transactions = transactions[:5]
 
-        response_text = f"📜 *Recent Transactions for Wallet:* `{wallet_address}`\n\n"
-        for tx in latest_transactions:
-            # Ensure that only the transaction dictionary is passed
-            response_text += (
-                await format_transaction_details(tx, wallet_address) + "\n---\n"
+        # Resolve each distinct mint's symbol once, concurrently
+        symbol_map = await resolve_token_symbols(latest_transactions)
+
+        formatted = await asyncio.gather(
+            *(
+                format_transaction_details(tx, wallet_address, symbol_map)
+                for tx in latest_transactions
             )
+        )
+        response_text = (
+            f"📜 *Recent Transactions for Wallet:* `{wallet_address}`\n\n"
+            + "".join(f"{text}\n---\n" for text in formatted)
+        )
 
         keyboard = [
             [
@@ -420,7 +567,7 @@ async def show_recent_transactions(
         )
 
     except Exception as e:
-        logger.error(f"Error in show_recent_transactions for {wallet_address}: {e}")
+        logger.error("Error in show_recent_transactions for %s: %s", wallet_address, e)
         await context.bot.send_message(
             chat_id=user_id,
             text=f"❌ Error fetching or displaying recent transactions for wallet `{wallet_address}`. Please try again later.",
@@ -428,17 +575,74 @@ async def show_recent_transactions(
         )
 
 
-async def wallet_tracking_job(application):
+async def wallet_tracking_job(context: CallbackContext):
     """
     Check for recent transactions for all tracked wallets.
     This function is meant to be called periodically by the job queue in bot.py.
     """
+    application = context.application
+    # Subscribers grouped by wallet so each wallet is fetched and diffed once
+    # per tick, however many users track it: {wallet_address: [user_id]}
     try:
-        # Iterate over users dynamically, fetching live tracked wallets
-        for user_id_str in list(_load_dashboard().keys()):
-            user_id = int(user_id_str)
-            wallets = get_user_dashboard(user_id).get("wallets", [])
-            for wallet_address in wallets:
-                await check_recent_transactions(wallet_address, user_id, application)
+        subscribers = _wallet_subscribers()
     except Exception as e:
-        logger.error(f"Error in wallet tracking job: {str(e)}")
+        logger.error("Error in wallet tracking job: %s", e)
+        return
+    _prune_untracked(subscribers)
+
+    # Skip wallets still backing off. A wallet that skipped ticks is fetched
+    # from the end of its last window, so the widest gap among due wallets
+    # sets this batch's start; the last_transaction_times diff drops repeats
+    now = time.monotonic()
+    due = [w for w in subscribers if w not in _poll_state or _poll_state[w][1] <= now]
+    if not due:
+        return
+    polled_at = time.time()
+    start_date = min(
+        [_tracking_start_date()]
+        + [int(_poll_state[w][2]) for w in due if w in _poll_state]
+    )
+
+    # One batched fetch for every distinct due wallet, finishing well inside
+    # the tick. Wallets whose last successful poll is oldest go first, so any
+    # cut off by the deadline lead the next tick
+    due.sort(key=lambda w: _poll_state[w][2] if w in _poll_state else 0)
+    activity = await fetch_wallet_activity_batch(
+        due,
+        startDate=start_date,
+        concurrency=WALLET_CHECK_CONCURRENCY,
+        deadline=WALLET_TRACKING_INTERVAL_SECONDS * 3 / 4,
+    )
+
+    # Re-read after the fetch so wallets removed meanwhile are skipped; one
+    # snapshot serves every wallet's still-tracked check
+    dashboard = _load_dashboard_ro()
+    checked = []
+    updates = []
+    for wallet_address in due:
+        recent_transactions = activity[wallet_address]
+        if isinstance(recent_transactions, Exception):
+            # Leave the poll state alone so the next tick retries this window
+            logger.error(
+                "Error checking recent transactions for wallet %s: %s",
+                wallet_address,
+                recent_transactions,
+            )
+            continue
+        checked.append(wallet_address)
+        updates.append(
+            _process_new_transactions(
+                wallet_address,
+                subscribers[wallet_address],
+                recent_transactions,
+                application,
+                dashboard,
+            )
+        )
+    for wallet_address, had_new in zip(checked, await asyncio.gather(*updates)):
+        # None means the alerts failed to render; like a failed fetch, leave
+        # the poll state alone so the next tick retries this window
+        if had_new is not None:
+            _record_poll(wallet_address, had_new, now, polled_at)
+    if _last_tx_times_dirty:
+        save_last_transaction_times()
@@ -1,23 +1,41 @@
 import logging
 import os
-import re  # Added import
 import time
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
-from telegram.error import BadRequest
 from telegram.ext import CallbackContext  # Modified import
 
 from api import fetch_whale_transaction_for_single_token  # Modified
 from core.dashboard import (
-    _load_dashboard,
+    _dashboard_users,
     add_tracked_whale_alert_token,
     get_token_alert_settings,
     get_tracked_whale_alert_tokens,
     remove_tracked_whale_alert_token,  # Added
 )
+from core.tokens import is_solana_address
+from core.utils import delete_message_after
 
 logger = logging.getLogger(__name__)
 
+# Minimum gap between whale alerts for the same (user, token); 0 (the default)
+# disables it. Each tick only looks back one interval, so whale transfers made
+# while a user is cooling down are never alerted to them: opt-in only
+WHALE_ALERT_COOLDOWN_SECONDS = int(os.getenv("WHALE_ALERT_COOLDOWN_SECONDS", 0))
+# (user_id, token_address) -> monotonic time of the last alert sent; only
+# enabled subscriptions still cooling down are kept from one tick to the next
+_last_alert_at = {}
+
+# Static keyboard rows; only the per-token rows are built per call
+_ADD_WHALE_ALERT_ROW = (
+    InlineKeyboardButton(
+        "➕ Add Whale Alert", callback_data="dashboard_add_whale_alert"
+    ),
+)
+_BACK_TO_MAIN_ROW = (
+    InlineKeyboardButton("Back to Main Menu 🔙", callback_data="start"),
+)
+
 
 # Command to access Whale Alert features
 async def whale_alerts_command(
@@ -52,19 +70,8 @@ async def whale_alerts_command(
                 InlineKeyboardButton(delete_text, callback_data=delete_data),  # Added
             ]
         )
-    # Add Whale Alert button
-    keyboard.append(
-        [
-            InlineKeyboardButton(
-                "➕ Add Whale Alert", callback_data="dashboard_add_whale_alert"
-            ),
-        ]
-    )
-    keyboard.append(
-        [
-            InlineKeyboardButton("Back to Main Menu 🔙", callback_data="start"),
-        ]
-    )
+    keyboard.append(_ADD_WHALE_ALERT_ROW)
+    keyboard.append(_BACK_TO_MAIN_ROW)
     reply_markup = InlineKeyboardMarkup(keyboard)
 
     status_lines = [
@@ -125,87 +132,102 @@ async def set_threshold_prompt(
 
 async def whale_alert_job(context: CallbackContext):  # Modified signature
     """Checks whale transactions for all users with alerts enabled and sends notifications."""
-    application = context.job.data  # Get Application instance from job context
-    dashboard = _load_dashboard()
-    for user_id_str in list(dashboard.keys()):
-        user_id = int(user_id_str)
-        # Iterate live tokens list so removals/disables skip fetch
-        for token_address in get_tracked_whale_alert_tokens(user_id):
-            settings = get_token_alert_settings(user_id, token_address)
+    application = context.application
+
+    # Group enabled subscriptions by token so each token is fetched once per
+    # tick, however many users track it: {token_address: [(user_id, threshold)]}
+    # Users still cooling down from a recent alert are left out, and a token
+    # whose subscribers are all cooling down isn't fetched at all
+    now = time.monotonic()
+    subscribers = {}
+    cooling = {}
+    for user_id, user in _dashboard_users():
+        tokens = user.get("whale_alert", {}).get("tokens", {})
+        if not isinstance(tokens, dict):
+            continue
+        for token_address, settings in tokens.items():
             if not settings.get("enabled", False):
                 continue
-            threshold = settings.get("threshold", 50000)
-            try:
-                # Re-check still enabled before API call
-                settings = get_token_alert_settings(user_id, token_address)
-                if not settings.get("enabled", False):
-                    continue
-                tx = await fetch_whale_transaction_for_single_token(
-                    token_address, min_amount_usd=threshold
-                )
-                if not tx:
-                    continue
-                value_usd = tx.get("valueUsd", "0")
-                try:
-                    if float(value_usd) < threshold:
-                        continue
-                except Exception:
-                    continue
-                token_symbol = tx.get("tokenSymbol", "Unknown Token")
-                token_address_display = token_address
-                amount = tx.get("calculatedAmount") or tx.get("amount", "?")
-                sender = tx.get("senderAddress", "Unknown")
-                receiver = tx.get("receiverAddress", "Unknown")
-                signature = tx.get("signature", "")
-                solscan_url = f"https://solscan.io/tx/{signature}"
-                alert_msg = (
-                    f"🐋💸 *Whale Alert!* 💸🐋\n\n"
-                    f"🪙 Token: *{token_symbol}*\n"
-                    f"🏷️ Address: `{token_address_display}`\n"
-                    f"💰 Amount: {amount} {token_symbol}\n"
-                    f"💵 Value: ${float(value_usd):,.2f}\n\n"
-                    f"👤 Sender: \n`{sender}`\n\n"
-                    f"👥 Receiver: \n`{receiver}`\n\n"
-                    f"🔗 [View on Solscan]({solscan_url})"
-                )
-                # Add inline buttons for this token (show threshold in button)
-                alert_markup = InlineKeyboardMarkup(
+            last = _last_alert_at.get((user_id, token_address))
+            if last is not None and now - last < WHALE_ALERT_COOLDOWN_SECONDS:
+                cooling[(user_id, token_address)] = last
+                continue
+            subscribers.setdefault(token_address, []).append(
+                (user_id, settings.get("threshold", 50000))
+            )
+    # Drop expired cooldowns and those of removed or disabled subscriptions
+    _last_alert_at.clear()
+    _last_alert_at.update(cooling)
+
+    for token_address, users in subscribers.items():
+        try:
+            tx = await fetch_whale_transaction_for_single_token(
+                token_address, min_amount_usd=min(t for _, t in users)
+            )
+        except Exception as e:
+            logger.error("Error in whale alert job for token %s: %s", token_address, e)
+            continue
+        if not tx:
+            continue
+        try:
+            value_usd = float(tx.get("valueUsd") or 0)
+        except (TypeError, ValueError):
+            continue
+        recipients = [(u, t) for u, t in users if value_usd >= t]
+        if not recipients:
+            continue
+
+        # The message is the same for every subscriber of this token; only the
+        # threshold button differs, so markups are built once per threshold
+        token_symbol = tx.get("tokenSymbol", "Unknown Token")
+        amount = tx.get("calculatedAmount") or tx.get("amount", "?")
+        alert_msg = (
+            f"🐋💸 *Whale Alert!* 💸🐋\n\n"
+            f"🪙 Token: *{token_symbol}*\n"
+            f"🏷️ Address: `{token_address}`\n"
+            f"💰 Amount: {amount} {token_symbol}\n"
+            f"💵 Value: ${value_usd:,.2f}\n\n"
+            f"👤 Sender: \n`{tx.get('senderAddress', 'Unknown')}`\n\n"
+            f"👥 Receiver: \n`{tx.get('receiverAddress', 'Unknown')}`\n\n"
+            f"🔗 [View on Solscan](https://solscan.io/tx/{tx.get('signature', '')})"
+        )
+        markups = {}
+
+        for user_id, threshold in recipients:
+            # Re-validate before sending: skip if the user disabled or removed
+            # this alert (removed tokens report enabled=False)
+            if not get_token_alert_settings(user_id, token_address).get(
+                "enabled", False
+            ):
+                continue
+            alert_markup = markups.get(threshold)
+            if alert_markup is None:
+                alert_markup = markups[threshold] = InlineKeyboardMarkup(
                     [
                         [
                             InlineKeyboardButton(
-                                f"{'🔴 Disable' if settings.get('enabled', False) else '🟢 Enable'} {token_address[:4]}...",
-                                callback_data=f"toggle_token_{'off' if settings.get('enabled', False) else 'on'}:{token_address}",
+                                f"🔴 Disable {token_address[:4]}...",
+                                callback_data=f"toggle_token_off:{token_address}",
                             ),
                             InlineKeyboardButton(
-                                f"Set Threshold (${settings.get('threshold', 0)})",
+                                f"Set Threshold (${threshold})",
                                 callback_data=f"change_threshold:{token_address}",
                             ),
                         ]
                     ]
                 )
-                # After computing tx and before sending, re-validate tracking status
-                # Cancel if user disabled or removed this alert
-                current_tokens = get_tracked_whale_alert_tokens(user_id)
-                if token_address not in current_tokens:
-                    continue
-                current_settings = get_token_alert_settings(user_id, token_address)
-                if not current_settings.get("enabled", False):
-                    continue
-
-                try:
-                    await application.bot.send_message(
-                        chat_id=user_id,
-                        text=alert_msg,
-                        parse_mode="Markdown",
-                        disable_web_page_preview=False,
-                        reply_markup=alert_markup,
-                    )
-                except Exception as e:
-                    logger.error(f"Failed to send whale alert to user {user_id}: {e}")
-            except BadRequest as e:
-                logger.warning(f"Failed to send whale alert to user {user_id}: {e}")
+            try:
+                await application.bot.send_message(
+                    chat_id=user_id,
+                    text=alert_msg,
+                    parse_mode="Markdown",
+                    disable_web_page_preview=False,
+                    reply_markup=alert_markup,
+                )
+                if WHALE_ALERT_COOLDOWN_SECONDS:
+                    _last_alert_at[(user_id, token_address)] = time.monotonic()
             except Exception as e:
-                logger.error(f"Error in whale alert job for user {user_id}: {e}")
+                logger.error("Failed to send whale alert to user %s: %s", user_id, e)
 
 
 # Handler for Track Whale Alerts button from token stats
@@ -222,7 +244,7 @@ async def track_token_whale_alert(
     token_address = query.data.replace("track_whale_alert_", "")
 
     # Basic validation for Solana token address
-    if not re.match(r"^[1-9A-HJ-NP-Za-km-z]{32,44}$", token_address):
+    if not is_solana_address(token_address):
         await query.message.reply_text(
             "❌ Invalid Solana token address format. Please ensure it is a valid address."
         )
@@ -248,13 +270,7 @@ async def track_token_whale_alert(
         await whale_alerts_command(update, context)
 
         # Delete the image after a short delay
-        time.sleep(3)
-        try:
-            await context.bot.delete_message(
-                chat_id=user_id, message_id=image_msg.message_id
-            )
-        except Exception as e:
-            logger.warning(f"Failed to delete whale alert image: {e}")
+        delete_message_after(context, user_id, image_msg.message_id)
     else:
         await query.message.reply_text(
             "This token is already in your whale alerts! 🐳\n"